@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 import urllib3
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QPushButton, QLabel, QTextEdit, QStackedWidget, \
@@ -5,6 +6,7 @@ from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QPushButton, QLabel
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import QTimer
 from seller_supp_api import authorize
+from station_registry import show_page
 from workplaces_choice import WorkplacesChoiceWidget
 
 
@@ -73,8 +75,7 @@ class AuthWidget(QWidget):
         if success:
             self.append_console(f"✅ Пользователь '{username}' авторизован")
             wp_widget = WorkplacesChoiceWidget(self.stacked_widget, username)
-            self.stacked_widget.addWidget(wp_widget)
-            self.stacked_widget.setCurrentWidget(wp_widget)
+            show_page(self.stacked_widget, wp_widget)
         else:
             if token_or_error == "401":
                 self.append_console("❌ Неверное имя пользователя или пароль")
@@ -97,6 +98,8 @@ class AuthGUI(QWidget):
 
 
 if __name__ == "__main__":
+    # нужно для пула процессов извлечения текста PDF в собранном .exe
+    multiprocessing.freeze_support()
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
     app = QApplication(sys.argv)
     window = AuthGUI()
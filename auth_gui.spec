@@ -8,7 +8,8 @@ a = Analysis(
      datas=[
         ('ding.wav', '.'),
     ],
-    hiddenimports=[],
+    # станции импортируются лениво (station_registry) — PyInstaller их сам не найдёт
+    hiddenimports=['pila_widget', 'kromka_widget', 'chpu_widget', 'upakovka_widget', 'upakovka_mebel_widget'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,73 @@
+"""
+Обновление этикеток по изменениям страниц (build_label_generation с previous) против полной
+переиндексации того же PDF. Новый PDF: из старого убраны первые --churn страниц, в конец добавлено
+столько же новых и одна страница отредактирована. Проверяется, что индекс совпадает с полной переиндексацией.
+
+    python bench/bench_diff_refresh.py [--pages 3000] [--churn 150]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+
+from label_pdf import labels_pdf
+from label_store import build_label_generation
+
+
+def edited_pdf(pdf_bytes, page_num):
+    """Копия PDF с дописанной на странице page_num строкой (меняет поток содержимого и шрифты страницы)"""
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        doc[page_num].insert_text((8, 80), "Re-labelled 7777", fontsize=6)
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def index_state(generation):
+    index = generation.label_index
+    return [{key: list(pages) for key, pages in entries.items()}
+            for entries in (index.orders, index.fragments, index.order_tokens)]
+
+
+def timed_build(pdf_bytes, digest, previous=None, message=None):
+    cache_dir = tempfile.mkdtemp(prefix="label_index_")
+    try:
+        started = time.perf_counter()
+        generation, _ = build_label_generation(pdf_bytes, digest, cache_dir, message, previous=previous)
+        return generation, time.perf_counter() - started
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=3000)
+    parser.add_argument("--churn", type=int, default=150)
+    args = parser.parse_args()
+
+    old_pdf = labels_pdf(args.pages)
+    new_pdf = edited_pdf(labels_pdf(args.pages, first_page=args.churn), args.pages // 2)
+
+    previous, _ = timed_build(old_pdf, "old")
+    messages = []
+    incremental, incremental_time = timed_build(new_pdf, "incremental", previous, messages.append)
+    assert messages and messages[-1].startswith("♻️"), "обновление по изменениям не сработало"
+    full, full_time = timed_build(new_pdf, "full")
+    assert index_state(incremental) == index_state(full), "индекс по изменениям отличается от полного"
+
+    print(f"страниц {args.pages}: убрано {args.churn}, добавлено {args.churn}, отредактирована 1")
+    print(f"по изменениям    {incremental_time:.2f} с ({messages[-1]})")
+    print(f"полностью        {full_time:.2f} с (индексы совпадают)")
+    for generation in (previous, incremental, full):
+        generation.release()
+
+
+if __name__ == "__main__":
+    main()
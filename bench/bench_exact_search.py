@@ -0,0 +1,72 @@
+"""
+Точный поиск заказа на одно сканирование: индекс LabelIndex (поиск в словаре) против
+прежнего перебора строк всех страниц, на синтетическом PDF этикеток.
+
+    python bench/bench_exact_search.py [--pages 10000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from label_index import LabelIndex
+from label_pdf import labels_pdf, order_number
+from pdf_text import iter_pages_text
+
+
+def line_scan_find(pages_text, query):
+    """Прежний поиск из виджета упаковки: все страницы, строки из цифр, дефисов и пробелов, первое слово"""
+    found_lines = []
+    for page_num, text in enumerate(pages_text):
+        filtered_text = [line.strip() for line in text if re.fullmatch(r"[0-9\- ]+", line.strip())]
+        for line in filtered_text:
+            clean_line = line.split(" ", 1)[0]
+            if clean_line.lower() == query.lower():
+                found_lines.append((page_num, clean_line))
+    return found_lines
+
+
+def measure(find, queries):
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(find(query))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    pdf_bytes = labels_pdf(args.pages)
+    pages_text = []
+    for _, chunk in iter_pages_text(pdf_bytes, args.pages, workers=1):
+        pages_text.extend(chunk)
+
+    started = time.perf_counter()
+    index = LabelIndex.from_pages(pages_text)
+    print(f"страниц {args.pages}, построение индекса {time.perf_counter() - started:.2f} с")
+
+    rng = random.Random(1)
+    # половина — заказы из PDF, половина — отсутствующие номера
+    queries = [order_number(rng.randrange(args.pages)) if n % 2 else f"{rng.randrange(10 ** 8)}-0"
+               for n in range(args.queries)]
+
+    scan_latencies, scan_results = measure(lambda query: line_scan_find(pages_text, query), queries)
+    index_latencies, index_results = measure(index.find_exact, queries)
+    assert index_results == scan_results, "индекс нашёл не те страницы"
+
+    for name, latencies in (("перебор строк", scan_latencies), ("индекс", index_latencies)):
+        print(f"{name:14} медиана {statistics.median(latencies):.3f} мс, max {max(latencies):.3f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Извлечение текста этикеток с областью номера заказа (pdf_text.EXTRACT_CLIP) против всей страницы:
+время и сколько номеров заказов найдено. Неверная область (без номера заказа) проверяет откат
+на текст всей страницы.
+
+Область задаётся в долях ширины и высоты страницы, как EXTRACT_CLIP.
+
+    python bench/bench_extract_clip.py [--pages 2000] [--clip 0 0 1 0.3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from label_index import extract_order_numbers
+from label_pdf import labels_pdf, order_number
+from pdf_text import iter_pages_text
+
+# область синтетической этикетки без строк, похожих на номер заказа
+WRONG_CLIP = (0, 0.4, 1, 0.6)
+
+
+def extract(pdf_bytes, pages, clip):
+    started = time.perf_counter()
+    found = 0
+    for start, chunk in iter_pages_text(pdf_bytes, pages, workers=1, clip=clip):
+        for page_num, lines in enumerate(chunk, start):
+            found += order_number(page_num) in extract_order_numbers(lines)
+    return time.perf_counter() - started, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--filler-lines", type=int, default=20)
+    parser.add_argument("--clip", type=float, nargs=4, default=(0, 0, 1, 0.3))
+    args = parser.parse_args()
+
+    pdf_bytes = labels_pdf(args.pages, args.filler_lines)
+    print(f"этикеток {args.pages} (58×40 мм, строк описания {args.filler_lines})")
+    for name, clip in (("вся страница", None), ("область номера", tuple(args.clip)), ("неверная область", WRONG_CLIP)):
+        elapsed, found = extract(pdf_bytes, args.pages, clip)
+        print(f"{name:17} {elapsed:.2f} с, найдено номеров {found}/{args.pages}")
+
+
+if __name__ == "__main__":
+    main()
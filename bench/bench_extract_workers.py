@@ -0,0 +1,49 @@
+"""
+Время извлечения текста PDF этикеток (pdf_text.iter_pages_text) в зависимости от числа процессов пула.
+
+    python bench/bench_extract_workers.py [--pages 20000] [--workers 1 2 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from label_pdf import labels_pdf
+from pdf_text import EXTRACT_WORKERS, MIN_PAGES_PER_WORKER, iter_pages_text
+
+
+def extract(pdf_path, pages, workers):
+    started = time.perf_counter()
+    extracted = sum(len(chunk) for _, chunk in iter_pages_text(pdf_path, pages, workers=workers))
+    assert extracted == pages
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, EXTRACT_WORKERS, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(labels_pdf(args.pages))
+    try:
+        print(f"страниц {args.pages}, ядер {os.cpu_count()}, EXTRACT_WORKERS = {EXTRACT_WORKERS}")
+        baseline = None
+        for workers in args.workers:
+            # iter_pages_text не запускает больше процессов, чем pages // MIN_PAGES_PER_WORKER
+            used = max(1, min(workers, args.pages // MIN_PAGES_PER_WORKER))
+            elapsed = extract(pdf_path, args.pages, workers)
+            baseline = baseline or elapsed
+            print(f"процессов {used:2}: {elapsed:.2f} с, ускорение ×{baseline / elapsed:.1f}")
+    finally:
+        os.remove(pdf_path)
+
+
+if __name__ == "__main__":
+    main()
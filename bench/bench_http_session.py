@@ -0,0 +1,91 @@
+"""
+Задержка валидации заказа на одно сканирование: общая keep-alive сессия
+(seller_supp_api.get_http_session) против нового соединения на каждый запрос (прежний requests.post).
+
+Сервер — локальная заглушка http.server, поэтому измеряется только накладная часть клиента
+и установка соединения. На реальном HTTPS-сервере разница больше (TLS-рукопожатие).
+
+    python bench/bench_http_session.py [--scans 500]
+"""
+import argparse
+import http.server
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+import seller_supp_api
+
+
+class ValidationHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # заголовки и тело уходят отдельными записями — без TCP_NODELAY keep-alive упирается в delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = json.dumps({"message": None, "needAlert": False}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def fresh_connection_validate(order_number):
+    """Прежний путь: requests.post без сессии — новое TCP-соединение на каждое сканирование"""
+    token = seller_supp_api.get_cached_token(seller_supp_api.USER_CONTEXT.first_username())
+    resp = requests.post(
+        f"{seller_supp_api.HOST}/api/v1/orders/validation",
+        json={"orderNumber": order_number, "isEmployeePreparedFacade": False},
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+        verify=False, timeout=5,
+    )
+    return resp.status_code == 200
+
+
+def pooled_validate(order_number):
+    return seller_supp_api.validate_order(order_number, False)[0]
+
+
+def measure(validate, scans):
+    latencies = []
+    for scan in range(scans):
+        started = time.perf_counter()
+        assert validate(f"{10000000 + scan}-1")
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scans", type=int, default=500)
+    args = parser.parse_args()
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), ValidationHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    seller_supp_api.HOST = f"http://127.0.0.1:{server.server_port}"
+    seller_supp_api.USER_CONTEXT.save_token("bench", "token")
+    try:
+        for name, validate in (("новое соединение", fresh_connection_validate), ("общая сессия", pooled_validate)):
+            validate("0-0")  # прогрев
+            latencies = measure(validate, args.scans)
+            print(f"{name:18} медиана {statistics.median(latencies):.2f} мс, "
+                  f"p95 {sorted(latencies)[int(len(latencies) * 0.95)]:.2f} мс")
+    finally:
+        seller_supp_api.USER_CONTEXT.remove("bench")
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Память и частичный поиск индекса этикеток на синтетическом PDF.
+
+Память (tracemalloc, на 1000 страниц): прежний список строк всех страниц (pages_text виджетов)
+против LabelIndex, заполняемого порциями без хранения текста страниц.
+Частичный поиск (начало номера + последние 4 символа): find_partial против прежнего перебора
+текста страниц — совпадение результатов и задержка промаха. Все этикетки содержат общее
+слово "2025", поэтому промах с этим суффиксом у прежнего поиска проверяет каждую страницу.
+
+    python bench/bench_label_index_memory.py [--pages 3000] [--filler-lines 20]
+"""
+import argparse
+import gc
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from label_index import ORDER_LINE_RE, LabelIndex
+from label_pdf import labels_pdf, order_number
+from pdf_text import iter_pages_text, open_pdf, page_text_loader
+
+
+def traced_bytes(build):
+    """Сколько памяти Python остаётся занятым результатом build()"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def full_text_partial(pages_text, query, order_lines_only=False):
+    """
+    Прежний частичный поиск виджета упаковки (первая по номеру страница из подходящих).
+    order_lines_only — начало номера ищется только в строках, похожих на номер заказа (как find_partial)
+    """
+    saved_suffix, short_query = query[-4:], query[:-4]
+    pages_with_short_query = {page_num for page_num, text in enumerate(pages_text)
+                              for line in text if short_query.lower() in line.lower()
+                              and (not order_lines_only or ORDER_LINE_RE.fullmatch(line.strip()))}
+    for page_num in sorted(pages_with_short_query):
+        for fragment in " ".join(pages_text[page_num]).split():
+            if len(fragment.strip()) == 4 and fragment.strip().lower() == saved_suffix.lower():
+                return page_num
+    return None
+
+
+def partial_queries(pages, count, rng):
+    """Смесь попаданий (начало номера + 4-символьное слово той же страницы) и промахов"""
+    queries = []
+    for n in range(count):
+        page_num = rng.randrange(pages)
+        prefix = order_number(page_num)[:rng.randrange(4, 9)]
+        if n % 3 == 0:
+            queries.append(prefix + rng.choice(["2025", "4607", "kzn1", f"{page_num % 1000:04d}"]))
+        elif n % 3 == 1:
+            queries.append(f"{rng.randrange(10 ** 6) + 90000000}2025")  # промах с общим суффиксом
+        else:
+            queries.append(prefix + "zzzz")  # промах по суффиксу
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=3000)
+    parser.add_argument("--queries", type=int, default=450)
+    # строк описания товара на этикетке: объём текста страницы, который раньше держался в памяти
+    parser.add_argument("--filler-lines", type=int, default=20)
+    args = parser.parse_args()
+
+    pdf_bytes = labels_pdf(args.pages, args.filler_lines)
+    doc = open_pdf(pdf_bytes)
+    per_1k = 1000 / args.pages
+
+    def build_pages_text():
+        pages_text = []
+        for _, chunk in iter_pages_text(pdf_bytes, args.pages, workers=1):
+            pages_text.extend(chunk)
+        return pages_text
+
+    def build_index():
+        index = LabelIndex(page_text_loader(doc))
+        for start, chunk in iter_pages_text(pdf_bytes, args.pages, workers=1):
+            index.add_pages(start, chunk)
+        index.finish()
+        return index
+
+    pages_text, text_size = traced_bytes(build_pages_text)
+    index, index_size = traced_bytes(build_index)
+    print(f"страниц {args.pages}, память на 1000 страниц: список строк {text_size * per_1k / 2 ** 20:.2f} МБ, "
+          f"индекс {index_size * per_1k / 2 ** 20:.2f} МБ")
+
+    queries = partial_queries(args.pages, args.queries, random.Random(1))
+    differences, other_lines, index_misses, scan_misses = 0, 0, [], []
+    for query in queries:
+        started = time.perf_counter()
+        expected = full_text_partial(pages_text, query)
+        scan_time = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        found = index.find_partial(query)
+        index_time = (time.perf_counter() - started) * 1000
+        if found != expected:
+            # индекс ищет начало номера только в строках с номером заказа: прежний поиск
+            # мог найти его, например, в артикуле товара на чужой этикетке
+            if found == full_text_partial(pages_text, query, order_lines_only=True):
+                other_lines += 1
+            else:
+                differences += 1
+        if expected is None:
+            scan_misses.append(scan_time)
+            index_misses.append(index_time)
+    print(f"частичный поиск: запросов {len(queries)}, расхождений {differences}, "
+          f"найдено прежним поиском только вне строк с номером заказа {other_lines}")
+    print(f"промах: перебор текста медиана {statistics.median(scan_misses):.2f} мс, "
+          f"индекс медиана {statistics.median(index_misses):.3f} мс")
+    doc.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Задержка печати одной этикетки: растровый бэкенд (RasterBackend, растры в папку вместо принтера)
+против прежнего пути через просмотрщик (временный файл + запуск внешнего процесса на каждую этикетку).
+
+Без принтера и просмотрщика вместо него запускается --viewer-cmd (по умолчанию — пустой процесс Python,
+то есть нижняя граница: настоящий просмотрщик PDF стартует дольше). На станции можно передать
+реальную команду, например --viewer-cmd "SumatraPDF.exe -print-to-default -silent".
+
+    python bench/bench_print_backends.py [--labels 50] [--viewer-cmd "..."]
+"""
+import argparse
+import os
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+
+from label_pdf import labels_pdf
+from print_spooler import PRINT_DPI, RasterBackend, print_with_file
+
+
+class CommandViewerBackend:
+    """Путь через просмотрщик: на каждую этикетку запускается внешняя команда с файлом PDF"""
+    keep_files = False
+
+    def __init__(self, command):
+        self.command = command
+
+    def print_file(self, path):
+        return subprocess.run(self.command + [path], stdout=subprocess.DEVNULL).returncode == 0
+
+
+def single_label_jobs(count):
+    """PDF одной этикетки на задание — как print_page виджета упаковки вырезает страницу заказа"""
+    source = fitz.open(stream=labels_pdf(count), filetype="pdf")
+    jobs = []
+    for page_num in range(count):
+        doc = fitz.open()
+        doc.insert_pdf(source, from_page=page_num, to_page=page_num)
+        jobs.append(doc.tobytes())
+        doc.close()
+    source.close()
+    return jobs
+
+
+def measure(print_job, jobs):
+    latencies = []
+    for number, pdf_bytes in enumerate(jobs):
+        started = time.perf_counter()
+        assert print_job(pdf_bytes, f"label_{number}.pdf")
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--labels", type=int, default=50)
+    parser.add_argument("--viewer-cmd", default=None)
+    args = parser.parse_args()
+
+    viewer_command = shlex.split(args.viewer_cmd) if args.viewer_cmd else [sys.executable, "-c", "pass"]
+    jobs = single_label_jobs(args.labels)
+    sink_dir = tempfile.mkdtemp(prefix="raster_sink_")
+    try:
+        raster = RasterBackend(dpi=PRINT_DPI, sink_dir=sink_dir)
+        viewer = CommandViewerBackend(viewer_command)
+        results = (
+            ("растр", measure(raster.print_bytes, jobs)),
+            ("просмотрщик", measure(lambda pdf_bytes, name: print_with_file(viewer, pdf_bytes, name), jobs)),
+        )
+    finally:
+        shutil.rmtree(sink_dir, ignore_errors=True)
+
+    print(f"этикеток {args.labels}, {PRINT_DPI} dpi, просмотрщик: {' '.join(viewer_command)}")
+    for name, latencies in results:
+        print(f"{name:12} медиана {statistics.median(latencies):.1f} мс, max {max(latencies):.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Скорость генерации QR-этикеток станции пилы: векторный QR прямо в PDF (qr_label.build_qr_label)
+против прежнего пути через PNG (qrcode.make → временный PNG → insert_image), этикеток в секунду.
+
+    python bench/bench_qr_labels.py [--labels 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+import qrcode
+
+from qr_label import build_qr_label, build_qr_labels
+
+
+def png_qr_label(text):
+    """Прежняя генерация из PilaWidget: QR растром через временный PNG"""
+    qr_img = qrcode.make(text)
+    width = 38 * 72 / 25.4
+    height = 38 * 72 / 25.4
+    doc = fitz.open()
+    page = doc.new_page(width=width, height=height)
+    img_temp = os.path.join(tempfile.gettempdir(), "qr_temp.png")
+    qr_img.convert("RGB").save(img_temp)
+    margin = 5
+    qr_size = min(width, height) - 2 * margin
+    x = (width - qr_size) / 2
+    y = (height - qr_size) / 2
+    page.insert_image(fitz.Rect(x, y, x + qr_size, y + qr_size), filename=img_temp)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    os.remove(img_temp)
+    return pdf_bytes
+
+
+def labels_per_second(build, texts):
+    started = time.perf_counter()
+    for text in texts:
+        build(text)
+    return len(texts) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--labels", type=int, default=500)
+    args = parser.parse_args()
+
+    texts = [f"{40000000 + n * 7}-{n % 9 + 1}" for n in range(args.labels)]
+    png_qr_label(texts[0])  # прогрев
+    build_qr_label(texts[0])
+
+    print(f"этикеток {args.labels}")
+    print(f"через PNG      {labels_per_second(png_qr_label, texts):7.0f} этикеток/с")
+    print(f"векторный QR   {labels_per_second(build_qr_label, texts):7.0f} этикеток/с")
+    started = time.perf_counter()
+    build_qr_labels(texts)
+    print(f"одним листом   {args.labels / (time.perf_counter() - started):7.0f} этикеток/с (build_qr_labels)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Время импорта auth_gui при запуске (в отдельном процессе, прогретый кэш байткода):
+с ленивым реестром станций против прежнего варианта, где модули всех станций
+импортировались вместе с auth_gui. Заодно проверяется, что fitz, qrcode и PIL до входа не загружаются.
+
+Подробная разбивка по модулям: python -X importtime -c "import auth_gui"
+
+    python bench/bench_startup_import.py [--runs 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+import auth_gui
+{eager}
+elapsed = time.perf_counter() - started
+print(json.dumps([elapsed, [name for name in ("fitz", "qrcode", "PIL") if name in sys.modules]]))
+"""
+# прежний auth_gui тянул модули станций через workplaces_choice и secondary_auth_gui
+EAGER_IMPORTS = """
+import station_registry
+for module_name, _ in set(station_registry.STATION_WIDGETS.values()):
+    __import__(module_name)
+"""
+
+
+def import_time(eager):
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", IMPORT_SNIPPET.format(eager=EAGER_IMPORTS if eager else "")],
+        cwd=REPO_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    elapsed, heavy = json.loads(output.strip().splitlines()[-1])
+    return elapsed, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    import_time(True)  # прогрев кэша байткода и файлового кэша
+    for name, eager in (("все станции сразу", True), ("ленивый реестр", False)):
+        runs = [import_time(eager) for _ in range(args.runs)]
+        times = [elapsed for elapsed, _ in runs]
+        heavy = runs[-1][1]
+        print(f"{name:18} медиана {statistics.median(times):.3f} с, min {min(times):.3f} с, "
+              f"загружены: {', '.join(heavy) or 'нет fitz/qrcode/PIL'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Синтетический PDF этикеток маркетплейса для бенчмарков: одна этикетка 58×40 мм на странице"""
+import zlib
+
+LABEL_WIDTH = 58 * 72 / 25.4
+LABEL_HEIGHT = 40 * 72 / 25.4
+
+
+def order_number(page_num):
+    """Номер заказа этикетки page_num"""
+    return f"{40000000 + page_num * 7}-{page_num % 9 + 1}"
+
+
+def label_lines(page_num, filler_lines=0):
+    """
+    (x, y сверху, размер шрифта, текст): номер заказа вверху, ниже — строки с 4-символьными словами.
+    filler_lines — сколько строк описания товара добавить мелким шрифтом (объём текста реальных этикеток)
+    """
+    filler = [
+        (8, 70 + line * 1.4, 1, f"Item {line + 1} Shkaf-kupe Lofty {page_num * 13 % 9973:04d} "
+                                f"belyi 1200x600x2100 art {(page_num * 31 + line) % 99991:05d} qty 1 pack {line % 3 + 1}/3")
+        for line in range(filler_lines)
+    ]
+    return filler + [
+        (8, 22, 11, order_number(page_num)),
+        (8, 40, 7, f"Client {page_num:05d} Sklad KZN1"),
+        (8, 52, 7, f"Rack 2025 cell {page_num % 1000:04d}"),
+        (8, 64, 7, "Fragile TOP this side"),
+        (8, 100, 7, f"{page_num % 97:02d} 4607 {page_num:07d}"),
+    ]
+
+
+def labels_pdf(pages, filler_lines=0, first_page=0):
+    """
+    PDF (bytes) из pages этикеток с номерами first_page, first_page + 1, ...
+    Файл пишется напрямую, а не через fitz: new_page на десятках тысяч страниц замедляется с ростом документа.
+    Шрифт один на все страницы — встроенный Helvetica, поэтому текст только латиницей.
+    filler_lines — см. label_lines
+    """
+    # 1 — каталог, 2 — дерево страниц, 3 — шрифт, далее по паре (страница, содержимое)
+    objects = [None, None, b"<</Type/Font/Subtype/Type1/BaseFont/Helvetica/Encoding/WinAnsiEncoding>>"]
+    kids = []
+    for page_num in range(first_page, first_page + pages):
+        page_obj = len(objects) + 1
+        content = zlib.compress("".join(
+            f"BT /F1 {size} Tf {x} {LABEL_HEIGHT - y:.2f} Td ({text}) Tj ET\n"
+            for x, y, size, text in label_lines(page_num, filler_lines)
+        ).encode("ascii"))
+        objects.append(
+            f"<</Type/Page/Parent 2 0 R/MediaBox[0 0 {LABEL_WIDTH:.2f} {LABEL_HEIGHT:.2f}]"
+            f"/Resources<</Font<</F1 3 0 R>>>>/Contents {page_obj + 1} 0 R>>".encode()
+        )
+        objects.append(b"<</Length %d/Filter/FlateDecode>>stream\n%s\nendstream" % (len(content), content))
+        kids.append(f"{page_obj} 0 R")
+    objects[0] = b"<</Type/Catalog/Pages 2 0 R>>"
+    objects[1] = f"<</Type/Pages/Count {pages}/Kids[{' '.join(kids)}]>>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<</Size %d/Root 1 0 R>>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(out)
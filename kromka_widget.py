@@ -1,11 +1,14 @@
-import sys, os, tempfile, threading, platform
+import platform
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QPushButton, QLineEdit, QTextEdit,
+    QWidget, QVBoxLayout, QPushButton, QLineEdit,
     QLabel, QMessageBox, QCheckBox
 )
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import pyqtSignal, QObject
-from seller_supp_api import send_work_process, validate_order  # метод для POST-запроса с USER_CONTEXT
+from log_view import LogView
+from scan_pipeline import ScanPipeline
+from task_executor import get_task_executor
+from seller_supp_api import send_work_process, get_work_outbox  # метод для POST-запроса с USER_CONTEXT
 
 if platform.system() == "Windows":
     import win32api
@@ -77,11 +80,10 @@ class KromkaWidget(QWidget):
         self.console_label.setFont(font)
         layout.addWidget(self.console_label)
 
-        self.results = QTextEdit()
+        self.results = LogView("Кромка")
         self.results.setFont(font)
-        self.results.setReadOnly(True)
         self.results.setStyleSheet("""
-            QTextEdit { border: 1px solid #CCCCCC; border-radius: 8px; padding: 6px; background-color: #FAFAFA; }
+            QPlainTextEdit { border: 1px solid #CCCCCC; border-radius: 8px; padding: 6px; background-color: #FAFAFA; }
         """)
         layout.addWidget(self.results)
 
@@ -91,6 +93,10 @@ class KromkaWidget(QWidget):
         self.signals = WorkerSignals()
         self.signals.console.connect(self.append_console)
         self.signals.clear.connect(self.clear_search_input)
+        # Результаты фоновой отправки work/process из очереди
+        get_work_outbox().add_listener(self.on_work_process_result)
+        # Проверка и отправка отсканированных заказов в фоне, по порядку сканирования
+        self.scan_pipeline = ScanPipeline(self.worker_send_request, self.on_order_rejected, owner=self)
 
         # Обработка Enter
         self.search_input.returnPressed.connect(self.send_request)
@@ -101,8 +107,25 @@ class KromkaWidget(QWidget):
 
     def append_console(self, text):
         """Добавляет сообщение в консоль"""
-        self.results.append(text)
-        self.results.verticalScrollBar().setValue(self.results.verticalScrollBar().maximum())
+        self.results.append_line(text)
+
+    def on_work_process_result(self, order_number, success, message):
+        """Результат отправки события из очереди (вызывается из фонового потока)"""
+        pending, failed = get_work_outbox().counts()
+        icon = "✅" if success else "❌"
+        self.signals.console.emit(f"{icon} {order_number}: {message} (в очереди: {pending}, с ошибкой: {failed})")
+
+    def dispose(self):
+        """Освобождает ресурсы виджета, когда станция закрывается или заменяется другой"""
+        get_task_executor().cancel(self)
+        get_work_outbox().remove_listener(self.on_work_process_result)
+        self.scan_pipeline.stop()
+        self.results.flush()
+
+    def closeEvent(self, event):
+        """Закрытие виджета: фоновые задачи отменяются, ресурсы освобождаются"""
+        self.dispose()
+        super().closeEvent(event)
 
     def clear_search_input(self):
         """Очищает поле ввода и чекбокс"""
@@ -120,34 +143,21 @@ class KromkaWidget(QWidget):
         if not text:
             QMessageBox.warning(self, "Ошибка", "Введите номер заказа!")
             return
-        success, message = validate_order(order_number=text, is_employee_prepared_facade=True)
-        if not success:
-            # Валидация не пройдена → выводим сообщение в консоль и прекращаем выполнение
-            self.signals.clear.emit()
-            self.append_console(f"❌ Валидация заказа не пройдена: {message}")
-            return
 
         operation_type = "PENALTY" if self.penalty_checkbox.isChecked() else "EARNING"
-        self.signals.console.emit(f"Отправка данных: {text}, операция: {operation_type}")
-        self.worker_send_request(text, operation_type)
-
-    def worker_send_request(self, text, operation_type):
-        """Запускает фоновый поток для запроса"""
-        try:
-            self.signals.console.emit("⏳ Отправка данных на сервер...")
+        # поле очищается сразу — следующий заказ можно сканировать, не дожидаясь сервера
+        self.clear_search_input()
+        pending = self.scan_pipeline.submit(text, True, operation_type)
+        self.append_console(f"📥 Заказ {text} принят, операция: {operation_type} (в обработке: {pending})")
 
-            thread = threading.Thread(
-                target=self.send_work_process_request,
-                args=(text, operation_type),
-                daemon=True
-            )
-            thread.start()
+    def on_order_rejected(self, order_number, message):
+        """Заказ не прошёл проверку (вызывается из потока конвейера)"""
+        self.signals.console.emit(f"❌ Валидация заказа {order_number} не пройдена: {message}")
 
-            # очищаем поля в главном потоке
-            self.signals.clear.emit()
-
-        except Exception as e:
-            self.signals.console.emit(f"❌ Ошибка при обработке: {e}")
+    def worker_send_request(self, text, operation_type):
+        """Заказ прошёл проверку — отправка данных (вызывается из потока конвейера)"""
+        self.signals.console.emit(f"⏳ Отправка данных на сервер: {text}, операция: {operation_type}")
+        self.send_work_process_request(text, operation_type)
 
     def send_work_process_request(self, order_number, operation_type):
         """Фоновая функция для запроса к серверу"""
@@ -0,0 +1,135 @@
+import threading
+from collections import OrderedDict
+
+import fitz
+
+from pdf_text import open_pdf
+
+# Ограничения кэша готовых к печати этикеток: количество — для каждого кэша,
+# размер — общий для всех кэшей (всех виджетов и поколений этикеток сразу)
+LABEL_CACHE_MAX_ITEMS = 2000
+LABEL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class LabelCacheBudget:
+    """Общий лимит памяти нескольких кэшей этикеток"""
+
+    def __init__(self, max_bytes=LABEL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def add(self, size):
+        with self._lock:
+            self.used += size
+
+    def exceeded(self):
+        with self._lock:
+            return self.used > self.max_bytes
+
+    def is_full(self):
+        with self._lock:
+            return self.used >= self.max_bytes
+
+
+_shared_budget = LabelCacheBudget()
+
+
+def split_page(doc, page_num):
+    """Одностраничный PDF со страницей page_num"""
+    writer = fitz.open()
+    try:
+        writer.insert_pdf(doc, from_page=page_num, to_page=page_num)
+        return writer.tobytes()
+    finally:
+        writer.close()
+
+
+class LabelPageCache:
+    """
+    LRU-кэш готовых к печати одностраничных PDF (page_num → bytes)
+    с ограничением по количеству и общему для всех кэшей размеру (budget). Кэш относится
+    к одному загруженному PDF — при загрузке нового создаётся новый кэш, а старый закрывается.
+    """
+
+    def __init__(self, max_items=LABEL_CACHE_MAX_ITEMS, budget=None):
+        self.max_items = max_items
+        self.budget = budget or _shared_budget
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._closed = False
+
+    def get(self, page_num):
+        with self._lock:
+            data = self._items.get(page_num)
+            if data is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(page_num)
+            self.hits += 1
+            return data
+
+    def put(self, page_num, data):
+        with self._lock:
+            if self._closed:
+                return
+            old = self._items.pop(page_num, None)
+            if old is not None:
+                self._bytes -= len(old)
+                self.budget.add(-len(old))
+            self._items[page_num] = data
+            self._bytes += len(data)
+            self.budget.add(len(data))
+            # вытесняются только свои этикетки: чужие кэши освобождают память при закрытии
+            while self._items and (len(self._items) > self.max_items or self.budget.exceeded()):
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.budget.add(-len(evicted))
+
+    def is_full(self):
+        with self._lock:
+            return len(self._items) >= self.max_items or self.budget.is_full()
+
+    def close(self):
+        """Освобождает память кэша; новые этикетки в него больше не кладутся"""
+        with self._lock:
+            self._closed = True
+            self._items.clear()
+            self.budget.add(-self._bytes)
+            self._bytes = 0
+
+    def __del__(self):
+        # кэш, не закрытый явно, возвращает свою долю общего лимита
+        self.close()
+
+    def stats(self):
+        with self._lock:
+            return {"items": len(self._items), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+def format_cache_stats(stats):
+    """Строка для консоли: размер кэша и попадания/промахи"""
+    return (f"{stats['items']} шт., {stats['bytes'] / (1024 * 1024):.1f} МБ, "
+            f"попаданий {stats['hits']}, промахов {stats['misses']}")
+
+
+def prefill_label_cache(cache, source, pages, stop_event):
+    """
+    Заранее разрезает страницы pages на одностраничные PDF, пока кэш не заполнится.
+    Работает с собственной копией документа (source — путь или bytes), — основной документ
+    виджета в это время используется для печати. Возвращает количество подготовленных этикеток.
+    """
+    doc = open_pdf(source)
+    prepared = 0
+    try:
+        for page_num in pages:
+            if stop_event.is_set() or cache.is_full():
+                break
+            cache.put(page_num, split_page(doc, page_num))
+            prepared += 1
+    finally:
+        doc.close()
+    return prepared
@@ -0,0 +1,243 @@
+import os
+import pickle
+import re
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+
+ORDER_LINE_RE = re.compile(r"[0-9\- ]+")
+ORDER_TOKEN_RE = re.compile(r"[0-9\-]+")
+
+# Версия формата кэша индекса: меняется при любом изменении структуры LabelIndex,
+# кэши старых версий игнорируются
+INDEX_CACHE_VERSION = 4
+# Сколько последних кэшей индекса хранить на диске
+INDEX_CACHE_KEEP = 5
+# Сколько текстов страниц держать в памяти для проверки частичного поиска
+PAGE_TEXT_CACHE_SIZE = 256
+
+
+def extract_order_numbers(lines):
+    """Номера заказов на странице: строки только из цифр, дефисов и пробелов, первое слово"""
+    orders = []
+    for line in lines:
+        line = line.strip()
+        if ORDER_LINE_RE.fullmatch(line):
+            orders.append(line.split(" ", 1)[0])
+    return orders
+
+
+class LabelIndex:
+    """
+    Индекс этикеток: номер заказа → страницы PDF.
+    Строится один раз после извлечения текста, поиск — поиск в словаре.
+
+    Для частичного поиска (начало номера + последние 4 символа) хранятся только
+    4-символьные слова страниц и слова строк, похожих на номер заказа (цифры, дефисы, пробелы):
+    начало номера из цифр и дефисов ищется в этих словах, без чтения текста страниц.
+    Страницы в индексе — компактные array('I') по возрастанию, полный текст страниц
+    в памяти не держится: для прочих запросов он читается из документа через
+    text_loader(page_num) и кэшируется для нескольких последних страниц.
+
+    Индекс можно заполнять порциями (add_pages) из фонового потока по порядку страниц:
+    поиск работает по уже проиндексированной части, wait_exact ждёт, пока нужная страница
+    не будет проиндексирована или индексация не завершится (finish).
+    """
+
+    def __init__(self, text_loader=None, clip=None):
+        self._cond = threading.Condition()
+        self.clip = clip  # область извлечения строк (pdf_text.EXTRACT_CLIP), с которой строился индекс
+        self.indexed_pages = 0
+        self.complete = False
+        self.text_loader = text_loader  # page_num -> текст страницы
+        self.orders = {}  # номер заказа (lower) -> array страниц
+        self.fragments = {}  # 4-символьное слово страницы (lower) -> array страниц
+        self.order_tokens = {}  # слово строки, похожей на номер заказа -> array страниц
+        self._texts_lock = threading.Lock()
+        self._texts = OrderedDict()  # page_num -> текст страницы (lower), последние прочитанные
+
+    @classmethod
+    def from_pages(cls, pages_text, text_loader=None, clip=None):
+        """Индекс по строкам страниц; без text_loader текст берётся из pages_text"""
+        if text_loader is None:
+            text_loader = lambda page_num: "\n".join(pages_text[page_num])
+        index = cls(text_loader, clip)
+        index.add_pages(0, pages_text)
+        index.finish()
+        return index
+
+    @classmethod
+    def from_state(cls, orders, fragments, order_tokens, page_count, text_loader=None, clip=None):
+        """Восстанавливает индекс из сохранённых номеров заказов, фрагментов и слов строк с номерами"""
+        index = cls(text_loader, clip)
+        index.orders = orders
+        index.fragments = fragments
+        index.order_tokens = order_tokens
+        index.indexed_pages = page_count
+        index.finish()
+        return index
+
+    def add_pages(self, start, pages_text):
+        """Добавляет порцию страниц, начиная со start, и будит ожидающие поиски"""
+        with self._cond:
+            for offset, lines in enumerate(pages_text):
+                self.add_page(start + offset, lines)
+            self.indexed_pages = start + len(pages_text)
+            self._cond.notify_all()
+
+    def finish(self):
+        """Индексация завершена (или прервана) — ожидающие поиски больше не ждут"""
+        with self._cond:
+            self.complete = True
+            self._cond.notify_all()
+
+    def add_page(self, page_num, lines):
+        orders, order_tokens = [], []
+        for line in lines:
+            line = line.strip()
+            if ORDER_LINE_RE.fullmatch(line):
+                # как extract_order_numbers: номер заказа — первое слово строки
+                words = line.lower().split()
+                orders.append(words[0])
+                order_tokens.extend(words)
+        fragments = [token for token in "\n".join(lines).lower().split() if len(token) == 4]
+        self.add_page_entries(page_num, orders, fragments, order_tokens)
+
+    def add_page_entries(self, page_num, orders, fragments, order_tokens):
+        """Добавляет страницу по готовым номерам заказов, фрагментам и словам строк с номерами (без разбора текста)"""
+        for items, index in ((orders, self.orders), (fragments, self.fragments), (order_tokens, self.order_tokens)):
+            for item in items:
+                pages = index.get(item)
+                if pages is None:
+                    pages = index[item] = array("I")
+                if not pages or pages[-1] != page_num:
+                    pages.append(page_num)
+
+    def page_entries(self):
+        """
+        Обратный индекс: page_num → ([номера заказов], [фрагменты], [слова строк с номерами]) —
+        для переноса страниц в новый индекс (аргументы add_page_entries)
+        """
+        entries = {}
+        with self._cond:
+            for position, index in enumerate((self.orders, self.fragments, self.order_tokens)):
+                for item, pages in index.items():
+                    for page_num in pages:
+                        entries.setdefault(page_num, ([], [], []))[position].append(item)
+        return entries
+
+    def page_text(self, page_num):
+        """Текст страницы (lower), строки через "\n" — читается из документа по требованию"""
+        with self._texts_lock:
+            text = self._texts.get(page_num)
+            if text is not None:
+                self._texts.move_to_end(page_num)
+                return text
+        text = "\n".join(self.text_loader(page_num).splitlines()).lower()
+        with self._texts_lock:
+            self._texts[page_num] = text
+            while len(self._texts) > PAGE_TEXT_CACHE_SIZE:
+                self._texts.popitem(last=False)
+        return text
+
+    def order_pages(self):
+        """Страницы, на которых найдены номера заказов, по порядку"""
+        with self._cond:
+            return sorted({page_num for pages in self.orders.values() for page_num in pages})
+
+    def find_exact(self, query):
+        """Возвращает [(page_num, order_number), ...] — как полный перебор строк по страницам"""
+        key = query.lower()
+        with self._cond:
+            return [(page_num, key) for page_num in self.orders.get(key, ())]
+
+    def find_partial(self, query):
+        """
+        Частичный поиск: страница, где есть строка с началом номера (query без последних 4 символов)
+        и отдельный фрагмент из последних 4 символов. Возвращает page_num или None.
+        Начало номера из цифр и дефисов ищется только в строках, похожих на номер заказа, —
+        по словам этих строк в индексе, пересечением со страницами фрагмента.
+        Прочие запросы проверяются по тексту страниц-кандидатов.
+        """
+        if len(query) <= 4:
+            return None
+        query = query.lower()
+        short_query, saved_suffix = query[:-4], query[-4:]
+
+        with self._cond:
+            pages = self.fragments.get(saved_suffix)
+            if not pages:
+                return None
+            if ORDER_TOKEN_RE.fullmatch(short_query):
+                found = set()
+                for token, token_pages in self.order_tokens.items():
+                    if short_query in token:
+                        found.update(token_pages)
+                found.intersection_update(pages)
+                return min(found) if found else None
+            # копия: текст страниц читается без блокировки индекса
+            pages = list(pages)
+        for page_num in pages:
+            if short_query in self.page_text(page_num):
+                return page_num
+        return None
+
+    def wait_exact(self, query):
+        """find_exact, дожидающийся страницы заказа или конца индексации"""
+        with self._cond:
+            while True:
+                found = self.find_exact(query)
+                # страницы индексируются по порядку, поэтому первая найденная уже окончательная
+                if found or self.complete:
+                    return found
+                self._cond.wait()
+
+
+def save_index(index, path):
+    """Сохраняет полностью построенный индекс на диск (атомарно, сжатый pickle)"""
+    with index._cond:
+        state = {
+            "version": INDEX_CACHE_VERSION,
+            "page_count": index.indexed_pages,
+            "clip": index.clip,
+            "orders": index.orders,
+            "fragments": index.fragments,
+            "order_tokens": index.order_tokens,
+        }
+        data = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+    prune_index_cache(os.path.dirname(path))
+
+
+def load_index(path, page_count, text_loader=None, clip=None):
+    """
+    Загружает индекс из кэша. None — если кэша нет, он повреждён, другой версии
+    или построен с другой областью извлечения строк clip
+    """
+    try:
+        with open(path, "rb") as f:
+            state = pickle.loads(zlib.decompress(f.read()))
+        if state.get("version") != INDEX_CACHE_VERSION or state["page_count"] != page_count \
+                or state["clip"] != clip:
+            return None
+        os.utime(path)
+        return LabelIndex.from_state(
+            state["orders"], state["fragments"], state["order_tokens"], page_count, text_loader, clip
+        )
+    except Exception:
+        return None
+
+
+def prune_index_cache(directory, keep=INDEX_CACHE_KEEP):
+    """Удаляет самые старые кэши индекса, оставляя keep последних"""
+    try:
+        paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".index")]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[keep:]:
+            os.remove(path)
+    except OSError:
+        pass
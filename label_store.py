@@ -0,0 +1,229 @@
+import hashlib
+import os
+import re
+import threading
+from array import array
+
+from label_cache import LabelPageCache, prefill_label_cache, split_page
+from label_index import LabelIndex, load_index, save_index
+from pdf_text import EXTRACT_CLIP, iter_pages_text, open_pdf, page_lines, page_text_loader, pdf_size
+
+# Обновление по изменённым страницам: если изменилось больше этой доли страниц,
+# индекс строится заново целиком — перенос старых записей уже не окупается
+DIFF_REFRESH_MAX_CHURN = 0.5
+# Доля различных отпечатков среди страниц, ниже которой отпечаткам не доверяем
+# (одинаковые потоки у разных этикеток — текст не в потоке страницы), и индекс строится целиком
+DIFF_REFRESH_MIN_UNIQUE = 0.9
+# Сколько добавленных и удалённых заказов перечислять в консоли
+ORDER_CHANGES_SHOWN = 5
+
+_XREF_RE = re.compile(r"(\d+) 0 R")
+
+
+class LabelGeneration:
+    """
+    Поколение этикеток: документ, индекс и кэш готовых к печати страниц одного загруженного PDF.
+    Виджет держит ссылку на текущее поколение и заменяет её целиком одним присваиванием,
+    а поиск берёт ссылку один раз и до конца работает с одним и тем же поколением —
+    половинчатого состояния (новый документ со старым индексом) не бывает.
+    Старое поколение закрывается само, когда на него не остаётся ссылок.
+    """
+
+    def __init__(self, doc, label_index, digest=None, source=None, fingerprints=None):
+        self.doc = doc
+        self.label_index = label_index
+        self.digest = digest  # SHA-256 PDF
+        self.source = source  # путь к PDF или bytes — для подготовки этикеток в отдельном документе
+        self.size = pdf_size(source) if source is not None else 0
+        self.fingerprints = fingerprints  # отпечатки страниц (page_fingerprints) для обновления по изменениям
+        self.page_cache = LabelPageCache()
+        self.prefill_stop = threading.Event()
+
+    @classmethod
+    def from_pdf(cls, pdf_bytes):
+        """Небольшой PDF (этикетка одного заказа): индекс строится сразу, без кэша"""
+        doc = open_pdf(pdf_bytes)
+        pages_text = [page_lines(doc[page], EXTRACT_CLIP) for page in range(len(doc))]
+        label_index = LabelIndex.from_pages(pages_text, page_text_loader(doc), EXTRACT_CLIP)
+        return cls(doc, label_index, source=pdf_bytes)
+
+    def page_count(self):
+        return len(self.doc)
+
+    def page_pdf(self, page_num):
+        """Одностраничный PDF для печати: из кэша подготовленных этикеток или нарезается сейчас"""
+        pdf_bytes = self.page_cache.get(page_num)
+        if pdf_bytes is None:
+            pdf_bytes = split_page(self.doc, page_num)
+            self.page_cache.put(page_num, pdf_bytes)
+        return pdf_bytes
+
+    def prefill(self):
+        """Заранее готовит к печати страницы с заказами. Возвращает количество подготовленных"""
+        return prefill_label_cache(self.page_cache, self.source, self.label_index.order_pages(), self.prefill_stop)
+
+    def fully_indexed(self):
+        """
+        Индекс покрывает все страницы. Прерванная индексация тоже завершается (finish),
+        но такое поколение нельзя считать готовым и переносить из него записи страниц
+        """
+        return self.label_index.complete and self.label_index.indexed_pages == self.page_count()
+
+    def release(self):
+        """Поколение заменено: подготовка этикеток останавливается, память кэша этикеток освобождается"""
+        self.prefill_stop.set()
+        self.page_cache.close()
+
+
+def _resource_refs(doc, page_xref, key):
+    """xref объектов из словаря ресурсов страницы (key — например, "Resources/Font")"""
+    kind, value = doc.xref_get_key(page_xref, key)
+    if kind == "null":
+        return []
+    if kind == "xref":
+        value = doc.xref_object(int(value.split()[0]), compressed=True)
+    return [int(xref) for xref in _XREF_RE.findall(value)]
+
+
+def _font_digest(doc, font_xref):
+    """
+    Хэш шрифта со всеми вложенными объектами (описание, файл шрифта, ToUnicode).
+    Номера объектов в разных выгрузках разные, поэтому ссылки в тексте объектов не хэшируются
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    pending, seen = [font_xref], set()
+    while pending:
+        xref = pending.pop()
+        if xref in seen:
+            continue
+        seen.add(xref)
+        obj = doc.xref_object(xref, compressed=True)
+        digest.update(_XREF_RE.sub("R", obj).encode())
+        if doc.xref_is_stream(xref):
+            digest.update(doc.xref_stream_raw(xref))
+        pending.extend(int(ref) for ref in _XREF_RE.findall(obj))
+    return digest.digest()
+
+
+def page_fingerprints(doc):
+    """
+    Отпечатки страниц doc: хэш сжатых потоков содержимого и XObject страницы
+    и её шрифтов — подмножества шрифтов часто перекодируются в каждой выгрузке,
+    и одинаковые байты потока содержимого могут означать разный текст.
+    Текст не извлекается и страницы не загружаются — одинаковые этикетки в разных
+    выгрузках дают одинаковый отпечаток, изменённые — другой.
+    """
+    fingerprints = array("Q")
+    fonts = {}  # xref шрифта -> хэш, шрифты обычно общие для многих страниц
+    for page_num in range(len(doc)):
+        page_xref = doc.page_xref(page_num)
+        streams = [int(xref) for xref in _XREF_RE.findall(doc.xref_get_key(page_xref, "Contents")[1])]
+        streams += _resource_refs(doc, page_xref, "Resources/XObject")
+        digest = hashlib.blake2b(digest_size=8)
+        for xref in streams:
+            digest.update(doc.xref_stream_raw(xref) or b"")
+            digest.update(b"\0")
+        for xref in _resource_refs(doc, page_xref, "Resources/Font"):
+            if xref not in fonts:
+                fonts[xref] = _font_digest(doc, xref)
+            digest.update(fonts[xref])
+        fingerprints.append(int.from_bytes(digest.digest(), "little"))
+    return fingerprints
+
+
+def order_changes(old_index, new_index):
+    """Заказы, появившиеся и пропавшие между двумя индексами: (added, removed), отсортированные"""
+    with old_index._cond:
+        old_orders = set(old_index.orders)
+    with new_index._cond:
+        new_orders = set(new_index.orders)
+    return sorted(new_orders - old_orders), sorted(old_orders - new_orders)
+
+
+def format_order_changes(added, removed):
+    """Строка для консоли: количество и первые ORDER_CHANGES_SHOWN добавленных и удалённых заказов"""
+    def shown(orders):
+        text = ", ".join(orders[:ORDER_CHANGES_SHOWN])
+        return text + (" …" if len(orders) > ORDER_CHANGES_SHOWN else "")
+
+    text = f"📋 Заказы: +{len(added)}, −{len(removed)}"
+    if added:
+        text += f"\n   добавлены: {shown(added)}"
+    if removed:
+        text += f"\n   удалены: {shown(removed)}"
+    return text
+
+
+def _changed_pages(fingerprints, previous):
+    """
+    Сопоставляет страницы с предыдущим поколением по отпечаткам.
+    Возвращает (old_pages, changed): для каждой страницы — номер такой же страницы в previous
+    или None, и количество новых/изменённых страниц. None — если индекс выгоднее строить заново.
+    """
+    if previous is None or previous.fingerprints is None or not previous.fully_indexed() \
+            or previous.label_index.clip != EXTRACT_CLIP:
+        return None
+    page_count = len(fingerprints)
+    if not page_count or len(set(fingerprints)) < page_count * DIFF_REFRESH_MIN_UNIQUE:
+        return None
+    old_pages = {}
+    for page_num, fingerprint in enumerate(previous.fingerprints):
+        old_pages.setdefault(fingerprint, page_num)
+    matched = [old_pages.get(fingerprint) for fingerprint in fingerprints]
+    changed = matched.count(None)
+    if changed > page_count * DIFF_REFRESH_MAX_CHURN:
+        return None
+    return matched, changed
+
+
+def build_label_generation(source, digest, cache_dir, message=None, on_indexing=None, previous=None):
+    """
+    Открывает PDF (source — путь к файлу или bytes) и строит для него индекс: из кэша на диске (cache_dir/<digest>.index),
+    если этот PDF уже индексировался, иначе — порциями, с сохранением в кэш.
+    previous — текущее поколение при обновлении: страницы с тем же отпечатком берутся
+    из его индекса, текст извлекается только из новых и изменённых страниц,
+    записи пропавших страниц в новый индекс не попадают.
+    message(text) — прогресс и предупреждения. on_indexing(generation) вызывается перед
+    индексацией, пока индекс ещё пустой: так первую загрузку можно показать сразу и искать
+    по мере индексации. Возвращает (generation, from_cache).
+    """
+    message = message or (lambda text: None)
+    doc = open_pdf(source)
+    page_count = len(doc)
+    index_path = os.path.join(cache_dir, f"{digest}.index")
+    fingerprints = page_fingerprints(doc)
+
+    # Этот PDF уже индексировался — текст страниц не извлекаем
+    label_index = load_index(index_path, page_count, page_text_loader(doc), EXTRACT_CLIP)
+    if label_index is not None:
+        return LabelGeneration(doc, label_index, digest, source, fingerprints), True
+
+    label_index = LabelIndex(page_text_loader(doc), EXTRACT_CLIP)
+    generation = LabelGeneration(doc, label_index, digest, source, fingerprints)
+    diff = _changed_pages(fingerprints, previous)
+    if on_indexing:
+        on_indexing(generation)
+    try:
+        if diff is not None:
+            old_pages, changed = diff
+            entries = previous.label_index.page_entries()
+            with label_index._cond:
+                for page_num, old_page in enumerate(old_pages):
+                    if old_page is None:
+                        label_index.add_page(page_num, page_lines(doc[page_num], EXTRACT_CLIP))
+                    else:
+                        label_index.add_page_entries(page_num, *entries.get(old_page, ((), (), ())))
+                label_index.indexed_pages = page_count
+            message(f"♻️ Переиндексировано страниц: {changed} из {page_count}")
+        else:
+            for start, chunk in iter_pages_text(source, page_count, clip=EXTRACT_CLIP):
+                label_index.add_pages(start, chunk)
+                message(f"⏳ Индексация этикеток: {label_index.indexed_pages}/{page_count} стр.")
+    finally:
+        # прерванная индексация не должна оставлять поиски ждать вечно
+        label_index.finish()
+    try:
+        save_index(label_index, index_path)
+    except OSError as e:
+        message(f"⚠️ Не удалось сохранить индекс этикеток: {e}")
+    return generation, False
@@ -0,0 +1,94 @@
+import logging
+import os
+import threading
+from logging.handlers import RotatingFileHandler
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtWidgets import QPlainTextEdit, QShortcut
+
+from seller_supp_api import CONSOLE_LOG_PATH
+from task_executor import format_task_metrics, get_task_executor
+
+# Сколько последних строк хранит консоль виджета (старые удаляются)
+CONSOLE_MAX_LINES = 2000
+# Сообщения, пришедшие за этот интервал, выводятся одной перерисовкой
+CONSOLE_FLUSH_INTERVAL_MS = 50
+# Дублировать вывод консолей в ротируемый файл журнала
+CONSOLE_LOG_TO_FILE = True
+CONSOLE_LOG_MAX_BYTES = 5 * 1024 * 1024
+CONSOLE_LOG_BACKUPS = 3
+# Клавиша отладки: состояние очередей фоновых задач выводится в консоль станции
+TASK_METRICS_HOTKEY = "F12"
+
+_file_logger = None
+_file_logger_lock = threading.Lock()
+
+
+def get_console_file_logger():
+    """Общий журнал консолей в CONSOLE_LOG_PATH (создаётся при первом обращении)"""
+    global _file_logger
+    if _file_logger is None:
+        with _file_logger_lock:
+            if _file_logger is None:
+                logger = logging.getLogger("station_console")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                try:
+                    os.makedirs(os.path.dirname(CONSOLE_LOG_PATH), exist_ok=True)
+                    handler = RotatingFileHandler(
+                        CONSOLE_LOG_PATH, maxBytes=CONSOLE_LOG_MAX_BYTES,
+                        backupCount=CONSOLE_LOG_BACKUPS, encoding="utf-8",
+                    )
+                    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                    logger.addHandler(handler)
+                except OSError as e:
+                    print(f"⚠️ Журнал консоли недоступен: {e}")
+                _file_logger = logger
+    return _file_logger
+
+
+class LogView(QPlainTextEdit):
+    """
+    Консоль виджета станции: хранит только последние max_lines строк,
+    сообщения копятся и выводятся одной перерисовкой раз в flush_interval_ms.
+    source — имя станции в файле журнала.
+    По TASK_METRICS_HOTKEY выводит состояние очередей фоновых задач.
+    """
+
+    def __init__(self, source="", max_lines=CONSOLE_MAX_LINES, flush_interval_ms=CONSOLE_FLUSH_INTERVAL_MS,
+                 log_to_file=CONSOLE_LOG_TO_FILE):
+        super().__init__()
+        self.source = source
+        self.max_lines = max_lines
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(max_lines)
+        self._pending = []
+        self._logger = get_console_file_logger() if log_to_file else None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(flush_interval_ms)
+        self._timer.timeout.connect(self.flush)
+        self._metrics_shortcut = QShortcut(QKeySequence(TASK_METRICS_HOTKEY), self)
+        self._metrics_shortcut.setContext(Qt.WindowShortcut)
+        self._metrics_shortcut.activated.connect(self.show_task_metrics)
+
+    def show_task_metrics(self):
+        self.append_line(f"📊 {format_task_metrics(get_task_executor().metrics())}")
+
+    def append_line(self, text):
+        """Добавляет сообщение (GUI-поток); на экран оно попадёт со следующей перерисовкой"""
+        self._pending.append(text)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        if not self._pending:
+            return
+        lines, self._pending = self._pending, []
+        if self._logger:
+            for line in lines:
+                self._logger.info("[%s] %s", self.source, line)
+        self.appendPlainText("\n".join(lines[-self.max_lines:]))
+        bar = self.verticalScrollBar()
+        bar.setValue(bar.maximum())
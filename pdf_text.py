@@ -0,0 +1,110 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+
+from label_index import extract_order_numbers
+
+# Количество процессов для извлечения текста (1 — без пула процессов)
+EXTRACT_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+# Меньше этого числа страниц на процесс запуск пула не окупается
+MIN_PAGES_PER_WORKER = 200
+# Размер порции страниц, которая извлекается и индексируется за один шаг
+PAGES_CHUNK = 250
+# Область этикетки с номером заказа в долях ширины и высоты страницы: (x0, y0, x1, y1).
+# None — извлекается текст всей страницы. Если в области не нашлось ни одного номера заказа,
+# для этой страницы берётся текст целиком. С заданной областью фрагменты для частичного
+# поиска индексируются только из неё.
+EXTRACT_CLIP = None
+
+
+def open_pdf(source):
+    """
+    Открывает PDF из файла (source — путь) или прямо из памяти (source — bytes),
+    без записи во временный файл. Файл читается по мере обращения к страницам
+    """
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def pdf_size(source):
+    """Размер PDF в байтах (source — путь или bytes)"""
+    return os.path.getsize(source) if isinstance(source, str) else len(source)
+
+
+def page_text_loader(doc):
+    """Функция page_num → текст страницы doc (для ленивого чтения текста индексом этикеток)"""
+    return lambda page_num: doc[page_num].get_text("text")
+
+
+def page_lines(page, clip=None):
+    """Строки страницы: только из области clip, если в ней есть номер заказа, иначе — всей страницы"""
+    if clip is not None:
+        rect = page.rect
+        clip_rect = fitz.Rect(
+            rect.x0 + rect.width * clip[0], rect.y0 + rect.height * clip[1],
+            rect.x0 + rect.width * clip[2], rect.y0 + rect.height * clip[3],
+        )
+        lines = page.get_text("text", clip=clip_rect).splitlines()
+        if extract_order_numbers(lines):
+            return lines
+    return page.get_text("text").splitlines()
+
+
+def _extract_range(pdf_path, start, stop, clip):
+    """Извлекает строки страниц [start, stop) в отдельном процессе"""
+    doc = fitz.open(pdf_path)
+    try:
+        return [page_lines(doc[page], clip) for page in range(start, stop)]
+    finally:
+        doc.close()
+
+
+def iter_pages_text(source, page_count, workers=None, chunk_size=PAGES_CHUNK, clip=EXTRACT_CLIP):
+    """
+    Порциями по порядку страниц отдаёт (start_page, [строки страницы, ...]).
+    source — путь к PDF или bytes (см. open_pdf). clip — область этикетки с номером заказа (см. EXTRACT_CLIP).
+    В одном процессе текст читается из отдельного документа
+    (основной документ виджета в это время может использоваться для печати).
+    Большие документы делятся на диапазоны страниц между процессами пула: каждый процесс
+    сам открывает файл (PDF из памяти для этого один раз пишется во временный файл),
+    порции отдаются в исходном порядке по мере готовности.
+    """
+    workers = EXTRACT_WORKERS if workers is None else workers
+    workers = min(workers, page_count // MIN_PAGES_PER_WORKER)
+    ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+    if workers <= 1:
+        doc = open_pdf(source)
+        try:
+            for start, stop in ranges:
+                yield start, [page_lines(doc[page], clip) for page in range(start, stop)]
+        finally:
+            doc.close()
+        return
+
+    spool_path = None
+    if isinstance(source, str):
+        pdf_path = source
+    else:
+        fd, spool_path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(source)
+        pdf_path = spool_path
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_extract_range, pdf_path, start, stop, clip) for start, stop in ranges]
+            try:
+                for (start, _), future in zip(ranges, futures):
+                    yield start, future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+    finally:
+        if spool_path:
+            try:
+                os.remove(spool_path)
+            except OSError:
+                pass
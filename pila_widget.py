@@ -1,8 +1,12 @@
-import sys, os, tempfile, threading, qrcode, fitz, win32api
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLineEdit, QTextEdit, QLabel, QMessageBox, QCheckBox
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLineEdit, QLabel, QMessageBox, QCheckBox
 from PyQt5.QtGui import QFont
-from PyQt5.QtCore import QTimer, pyqtSignal, QObject
-from seller_supp_api import send_work_process, validate_order  # метод для POST-запроса с USER_CONTEXT
+from PyQt5.QtCore import pyqtSignal, QObject
+from qr_label import build_qr_label, build_qr_labels, QrLabelBatch
+from print_spooler import get_print_spooler, JOB_DONE, JOB_FAILED
+from log_view import LogView
+from scan_pipeline import ScanPipeline
+from task_executor import get_task_executor
+from seller_supp_api import send_work_process, get_work_outbox  # метод для POST-запроса с USER_CONTEXT
 
 
 class WorkerSignals(QObject):
@@ -60,6 +64,12 @@ class PilaWidget(QWidget):
         """)
         layout.addWidget(self.penalty_checkbox)
 
+        # Пакетная печать: этикетки копятся и печатаются одним заданием
+        self.batch_checkbox = QCheckBox("Пакетная печать")
+        self.batch_checkbox.setFont(font)
+        self.batch_checkbox.toggled.connect(self.on_batch_toggled)
+        layout.addWidget(self.batch_checkbox)
+
         # Кнопка печати
         self.print_button = QPushButton("Выполнить")
         self.print_button.setFont(font)
@@ -83,11 +93,10 @@ class PilaWidget(QWidget):
         self.console_label.setFont(font)
         layout.addWidget(self.console_label)
 
-        self.results = QTextEdit()
+        self.results = LogView("Пила")
         self.results.setFont(font)
-        self.results.setReadOnly(True)
         self.results.setStyleSheet("""
-            QTextEdit {
+            QPlainTextEdit {
                 border: 1px solid #CCCCCC;
                 border-radius: 8px;
                 padding: 6px;
@@ -97,19 +106,48 @@ class PilaWidget(QWidget):
         layout.addWidget(self.results)
 
         self.setLayout(layout)
-        self.temp_pdf = os.path.join(tempfile.gettempdir(), "qr_print.pdf")
 
         # Подключение сигналов
         self.signals = WorkerSignals()
         self.signals.message.connect(self.append_console)
         self.signals.clear.connect(self.clear_search_input)
+        # Результаты фоновой отправки work/process из очереди
+        get_work_outbox().add_listener(self.on_work_process_result)
+        # Накопитель этикеток для пакетной печати
+        self.label_batch = QrLabelBatch(self.print_batch)
+        # Проверка, генерация и печать отсканированных заказов в фоне, по порядку сканирования
+        self.scan_pipeline = ScanPipeline(self.worker_generate_and_print, self.on_order_rejected, owner=self)
 
         self.search_input.returnPressed.connect(self.generate_and_print_qr)
 
     def append_console(self, text):
         """Вывод сообщений в консоль"""
-        self.results.append(text)
-        self.results.verticalScrollBar().setValue(self.results.verticalScrollBar().maximum())
+        self.results.append_line(text)
+
+    def on_work_process_result(self, order_number, success, message):
+        """Результат отправки события из очереди (вызывается из фонового потока)"""
+        pending, failed = get_work_outbox().counts()
+        icon = "✅" if success else "❌"
+        self.signals.message.emit(f"{icon} {order_number}: {message} (в очереди: {pending}, с ошибкой: {failed})")
+
+    def dispose(self):
+        """Освобождает ресурсы виджета, когда станция закрывается или заменяется другой"""
+        get_task_executor().cancel(self)
+        get_work_outbox().remove_listener(self.on_work_process_result)
+        self.scan_pipeline.stop()
+        # недобранный пакет этикеток не теряется — уходит на печать
+        get_task_executor().submit("print", self.label_batch.flush)
+        self.results.flush()
+
+    def closeEvent(self, event):
+        """Закрытие виджета: фоновые задачи отменяются, ресурсы освобождаются"""
+        self.dispose()
+        super().closeEvent(event)
+
+    def on_batch_toggled(self, checked):
+        """При выключении пакетного режима недобранный пакет сразу уходит на печать"""
+        if not checked:
+            get_task_executor().submit("print", self.label_batch.flush, owner=self)
 
     def clear_search_input(self):
         """Очистка поля ввода и чекбокса"""
@@ -124,67 +162,63 @@ class PilaWidget(QWidget):
             QMessageBox.warning(self, "Ошибка", "Введите строку для генерации QR-кода!")
             return
 
-            # ---------------- Валидация заказа ----------------
-        success, message = validate_order(order_number=text, is_employee_prepared_facade=True)
-        if not success:
-            # Валидация не пройдена → выводим сообщение в консоль и прекращаем выполнение
-            self.signals.clear.emit()
-            self.append_console(f"❌ Валидация заказа не пройдена: {message}")
-            return
-        # Если success == True → продолжаем выполнение, ничего не выводим
-
         operation_type = "PENALTY" if self.penalty_checkbox.isChecked() else "EARNING"
-        self.append_console(f"Генерация QR для: {text}, операция: {operation_type}")
-        threading.Thread(target=self.worker_generate_and_print, args=(text, operation_type), daemon=True).start()
-
-    def worker_generate_and_print(self, text, operation_type):
-        """Фоновая задача по генерации и печати QR"""
+        batch = self.batch_checkbox.isChecked()
+        # поле очищается сразу — следующий заказ можно сканировать, не дожидаясь сервера
+        self.clear_search_input()
+        pending = self.scan_pipeline.submit(text, True, operation_type, batch)
+        self.append_console(f"📥 Заказ {text} принят, операция: {operation_type} (в обработке: {pending})")
+
+    def on_order_rejected(self, order_number, message):
+        """Заказ не прошёл проверку (вызывается из потока конвейера)"""
+        self.signals.message.emit(f"❌ Валидация заказа {order_number} не пройдена: {message}")
+
+    def worker_generate_and_print(self, text, operation_type, batch=False):
+        """Генерация и печать QR для проверенного заказа (вызывается из потока конвейера)"""
         try:
             if operation_type == "PENALTY":
-                self.signals.message.emit("⚠️ БРАК — печать QR пропущена.")
-                threading.Thread(target=self.send_work_process_request, args=(text, operation_type), daemon=True).start()
-                self.signals.clear.emit()
+                self.signals.message.emit(f"⚠️ БРАК — печать QR пропущена: {text}")
+                self.send_work_process_request(text, operation_type)
                 return
 
-            # Генерация PDF с QR
-            qr_img = qrcode.make(text)
-            width = 38 * 72 / 25.4
-            height = 38 * 72 / 25.4
-            doc = fitz.open()
-            page = doc.new_page(width=width, height=height)
-            img_temp = os.path.join(tempfile.gettempdir(), "qr_temp.png")
-            qr_img.convert("RGB").save(img_temp)
-            margin = 5
-            qr_size = min(width, height) - 2 * margin
-            x = (width - qr_size) / 2
-            y = (height - qr_size) / 2
-            page.insert_image(fitz.Rect(x, y, x + qr_size, y + qr_size), filename=img_temp)
-            doc.save(self.temp_pdf)
-            doc.close()
-            os.remove(img_temp)
-
-            self.signals.message.emit(f"PDF с QR создан: {self.temp_pdf}")
-            self.signals.message.emit("Отправка на печать...")
-
-            success = False
-            try:
-                result = win32api.ShellExecute(0, "print", self.temp_pdf, None, ".", 0)
-                if result > 32:
-                    success = True
-            except Exception as e:
-                self.signals.message.emit(f"Ошибка при печати: {e}")
+            if batch:
+                size = self.label_batch.add(text)
+                if size < self.label_batch.max_items:
+                    self.signals.message.emit(f"📦 {text} добавлен в пакет ({size}/{self.label_batch.max_items})")
+                return
 
-            if success:
-                self.signals.message.emit("✅ Печать выполнена успешно!")
-                threading.Thread(target=self.send_work_process_request, args=(text, operation_type), daemon=True).start()
-            else:
-                self.signals.message.emit("⚠️ Принтер не найден или недоступен.")
+            # Генерация PDF с QR (векторный QR, без временных файлов)
+            pdf_bytes = build_qr_label(text)
 
-            self.signals.clear.emit()
+            self.signals.message.emit(f"PDF с QR создан: {text}")
+            self.signals.message.emit("Отправка на печать...")
+            get_print_spooler().submit(pdf_bytes, "qr_print.pdf", self.make_print_status_handler([text], operation_type))
 
         except Exception as e:
             self.signals.message.emit(f"❌ Ошибка генерации QR/PDF: {e}")
 
+    def print_batch(self, order_numbers):
+        """Печать пакета этикеток одним заданием (из потока накопителя)"""
+        try:
+            pdf_bytes = build_qr_labels(order_numbers)
+            self.signals.message.emit(f"📦 Пакет из {len(order_numbers)} этикеток отправлен на печать")
+            get_print_spooler().submit(pdf_bytes, "qr_batch.pdf", self.make_print_status_handler(order_numbers, "EARNING"))
+        except Exception as e:
+            self.signals.message.emit(f"❌ Ошибка генерации пакета QR/PDF: {e}")
+
+    def make_print_status_handler(self, order_numbers, operation_type):
+        """Обработчик статуса задания печати: work/process отправляются после успешной печати"""
+        def on_status(job):
+            if job.status == JOB_DONE:
+                self.signals.message.emit("✅ Печать выполнена успешно!")
+                for order_number in order_numbers:
+                    self.send_work_process_request(order_number, operation_type)
+            elif job.status == JOB_FAILED:
+                if job.error:
+                    self.signals.message.emit(f"Ошибка при печати: {job.error}")
+                self.signals.message.emit("⚠️ Принтер не найден или недоступен.")
+        return on_status
+
     def send_work_process_request(self, order_number, operation_type):
         """Отправка данных о работе в API"""
         try:
@@ -0,0 +1,295 @@
+import itertools
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+JOB_QUEUED = "queued"
+JOB_PRINTING = "printing"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Способ печати по умолчанию: "raster" — страница растрируется и уходит прямо в очередь принтера
+# (при ошибке — через просмотрщик), "viewer" — через просмотрщик PDF (ShellExecute/lp с PDF).
+# "viewer" — пока растровая печать не проверена на принтерах станций
+PRINT_MODE = "viewer"
+# Разрешение растра, если драйвер не сообщает своё (типичный термопринтер этикеток — 203 dpi)
+PRINT_DPI = 203
+# Имя принтера (None — принтер по умолчанию)
+PRINTER_NAME = None
+
+# Сколько заданий печатается одновременно (1 — строго по порядку сканирования)
+PRINT_MAX_CONCURRENT = 1
+# Сколько раз повторять неудачное задание
+PRINT_RETRIES = 1
+PRINT_RETRY_DELAY = 1.0
+
+
+class ShellExecuteBackend:
+    """Печать через связанное с PDF приложение Windows"""
+    # Просмотрщик открывает файл уже после возврата ShellExecute — файл не удаляем
+    keep_files = True
+
+    def print_file(self, path):
+        import win32api
+        return win32api.ShellExecute(0, "print", path, None, ".", 0) > 32
+
+
+class LpBackend:
+    """Печать через CUPS (lp)"""
+    keep_files = False
+
+    def print_file(self, path):
+        return subprocess.run(["lp", path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+
+
+class FileSinkBackend:
+    """Складывает задания в папку вместо принтера (для проверки без принтера)"""
+    keep_files = False
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._counter = itertools.count(1)
+        os.makedirs(directory, exist_ok=True)
+
+    def print_file(self, path):
+        target = os.path.join(self.directory, f"{next(self._counter):06d}_{os.path.basename(path)}")
+        shutil.copyfile(path, target)
+        return True
+
+
+def print_with_file(backend, pdf_bytes, name):
+    """Печать через бэкенд, которому нужен файл: PDF пишется во временный файл"""
+    fd, path = tempfile.mkstemp(suffix=f"_{name}")
+    with os.fdopen(fd, "wb") as f:
+        f.write(pdf_bytes)
+    try:
+        return backend.print_file(path)
+    finally:
+        if not getattr(backend, "keep_files", False):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class RasterBackend:
+    """
+    Печать без запуска просмотрщика PDF: каждая страница один раз растрируется fitz
+    в разрешении принтера и отправляется в очередь печати напрямую
+    (Windows — через GDI принтера, иначе — PNG в lp с тем же ppi).
+    sink_dir — вместо принтера складывать растры в папку (для проверки без принтера).
+    fallback — бэкенд с print_file, которым задание печатается, если растровая печать не удалась.
+    """
+
+    def __init__(self, printer_name=PRINTER_NAME, dpi=PRINT_DPI, sink_dir=None, fallback=None):
+        self.printer_name = printer_name
+        self.dpi = dpi
+        self.sink_dir = sink_dir
+        self.fallback = fallback
+        self._counter = itertools.count(1)
+        if sink_dir:
+            os.makedirs(sink_dir, exist_ok=True)
+
+    def print_bytes(self, pdf_bytes, name):
+        try:
+            if self._print_raster(pdf_bytes, name):
+                return True
+            error = "принтер не принял задание"
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            error = e
+        if self.fallback is None:
+            return False
+        print(f"Растровая печать {name} не удалась ({error}), печать через просмотрщик")
+        return print_with_file(self.fallback, pdf_bytes, name)
+
+    def _print_raster(self, pdf_bytes, name):
+        import fitz
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        try:
+            if self.sink_dir:
+                return self._print_to_sink(doc, name)
+            if platform.system() == "Windows":
+                return self._print_gdi(doc, name)
+            return self._print_lp(doc)
+        finally:
+            doc.close()
+
+    def _render(self, page, dpi):
+        import fitz
+        return page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+
+    def _print_to_sink(self, doc, name):
+        for page in doc:
+            target = os.path.join(self.sink_dir, f"{next(self._counter):06d}_{name}.png")
+            self._render(page, self.dpi).save(target)
+        return True
+
+    def _print_lp(self, doc):
+        command = ["lp", "-o", f"ppi={self.dpi}"]
+        if self.printer_name:
+            command += ["-d", self.printer_name]
+        for page in doc:
+            png = self._render(page, self.dpi).tobytes("png")
+            result = subprocess.run(command + ["-"], input=png, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if result.returncode != 0:
+                return False
+        return True
+
+    def _print_gdi(self, doc, name):
+        import win32print
+        import win32ui
+        from PIL import Image, ImageWin
+
+        printer_name = self.printer_name or win32print.GetDefaultPrinter()
+        hdc = win32ui.CreateDC()
+        hdc.CreatePrinterDC(printer_name)
+        try:
+            dpi = hdc.GetDeviceCaps(88) or self.dpi  # LOGPIXELSX
+            hdc.StartDoc(name)
+            try:
+                for page in doc:
+                    pix = self._render(page, dpi)
+                    image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+                    hdc.StartPage()
+                    ImageWin.Dib(image).draw(hdc.GetHandleOutput(), (0, 0, pix.width, pix.height))
+                    hdc.EndPage()
+            except Exception:
+                # недопечатанное задание не должно остаться в очереди принтера
+                hdc.AbortDoc()
+                raise
+            hdc.EndDoc()
+        finally:
+            hdc.DeleteDC()
+        return True
+
+
+def viewer_backend():
+    return ShellExecuteBackend() if platform.system() == "Windows" else LpBackend()
+
+
+def default_backend():
+    if PRINT_MODE == "raster":
+        return RasterBackend(fallback=viewer_backend())
+    return viewer_backend()
+
+
+class PrintJob:
+    def __init__(self, job_id, pdf_bytes, name, on_status):
+        self.id = job_id
+        self.pdf_bytes = pdf_bytes
+        self.name = name
+        self.on_status = on_status
+        self.status = JOB_QUEUED
+        self.attempts = 0
+        self.error = None
+
+
+class PrintSpooler:
+    """
+    Общая очередь печати для всех виджетов: задания печатаются по порядку (FIFO),
+    не более max_concurrent одновременно, с повторами при ошибке.
+    on_status(job) вызывается из потока очереди при каждой смене job.status.
+    """
+
+    def __init__(self, backend=None, max_concurrent=PRINT_MAX_CONCURRENT, retries=PRINT_RETRIES):
+        self.backend = backend or default_backend()
+        self.retries = retries
+        self._queue = queue.Queue()
+        self._ids = itertools.count(1)
+        self._workers = [
+            threading.Thread(target=self._run, name=f"print-spooler-{i}", daemon=True)
+            for i in range(max_concurrent)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, pdf_bytes, name="label.pdf", on_status=None):
+        job = PrintJob(next(self._ids), pdf_bytes, name, on_status)
+        self._set_status(job, JOB_QUEUED)
+        self._queue.put(job)
+        return job
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _set_status(self, job, status):
+        job.status = status
+        if job.on_status:
+            try:
+                job.on_status(job)
+            except Exception as e:
+                print(f"Ошибка обработчика статуса печати: {e}")
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._print(job)
+            finally:
+                self._queue.task_done()
+
+    def _print(self, job):
+        self._set_status(job, JOB_PRINTING)
+        # Бэкенды с print_bytes печатают из памяти, остальным нужен файл
+        direct = hasattr(self.backend, "print_bytes")
+        path = None
+        if not direct:
+            fd, path = tempfile.mkstemp(suffix=f"_{job.name}")
+            with os.fdopen(fd, "wb") as f:
+                f.write(job.pdf_bytes)
+        try:
+            while True:
+                job.attempts += 1
+                try:
+                    job.error = None
+                    if direct:
+                        success = self.backend.print_bytes(job.pdf_bytes, job.name)
+                    else:
+                        success = self.backend.print_file(path)
+                except Exception as e:
+                    job.error = str(e)
+                    success = False
+                if success:
+                    job.pdf_bytes = None
+                    self._set_status(job, JOB_DONE)
+                    return
+                if job.attempts > self.retries:
+                    job.pdf_bytes = None
+                    self._set_status(job, JOB_FAILED)
+                    return
+                time.sleep(PRINT_RETRY_DELAY)
+        finally:
+            if path and not getattr(self.backend, "keep_files", False):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+_spooler = None
+_spooler_lock = threading.Lock()
+
+
+def get_print_spooler():
+    """Общая очередь печати (создаётся при первом обращении)"""
+    global _spooler
+    if _spooler is None:
+        with _spooler_lock:
+            if _spooler is None:
+                _spooler = PrintSpooler()
+    return _spooler
+
+
+def configure_print_spooler(backend=None, max_concurrent=PRINT_MAX_CONCURRENT, retries=PRINT_RETRIES):
+    """Заменяет общую очередь печати (например, FileSinkBackend для проверки на Linux)"""
+    global _spooler
+    with _spooler_lock:
+        _spooler = PrintSpooler(backend, max_concurrent, retries)
+    return _spooler
@@ -0,0 +1,129 @@
+import threading
+
+import fitz
+import qrcode
+
+# Шаблон этикетки с QR: 38×38 мм, QR по центру с полями
+LABEL_SIZE_MM = 38
+LABEL_MARGIN = 5
+LABEL_WIDTH = LABEL_SIZE_MM * 72 / 25.4
+LABEL_HEIGHT = LABEL_SIZE_MM * 72 / 25.4
+_QR_SIZE = min(LABEL_WIDTH, LABEL_HEIGHT) - 2 * LABEL_MARGIN
+QR_RECT = fitz.Rect(
+    (LABEL_WIDTH - _QR_SIZE) / 2,
+    (LABEL_HEIGHT - _QR_SIZE) / 2,
+    (LABEL_WIDTH + _QR_SIZE) / 2,
+    (LABEL_HEIGHT + _QR_SIZE) / 2,
+)
+
+# Пакетная печать: лист уходит на печать, когда набралось QR_BATCH_SIZE этикеток
+# или прошло QR_BATCH_TIMEOUT секунд с первой этикетки в пакете
+QR_BATCH_SIZE = 10
+QR_BATCH_TIMEOUT = 5.0
+
+
+def qr_matrix(text):
+    """Матрица модулей QR (с белой рамкой, как у qrcode.make)"""
+    qr = qrcode.QRCode()
+    qr.add_data(text)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def qr_content_stream(rect, page_height, text):
+    """
+    Поток команд PDF, рисующий QR векторно: чёрные модули строки объединяются
+    в прямоугольники и заливаются одной командой
+    """
+    matrix = qr_matrix(text)
+    module = rect.width / len(matrix)
+    ops = ["q 0 g"]
+    for row_num, row in enumerate(matrix):
+        # в PDF ось Y направлена вверх
+        y = page_height - rect.y0 - (row_num + 1) * module
+        col = 0
+        while col < len(row):
+            if not row[col]:
+                col += 1
+                continue
+            start = col
+            while col < len(row) and row[col]:
+                col += 1
+            ops.append(f"{rect.x0 + start * module:.3f} {y:.3f} {(col - start) * module:.3f} {module:.3f} re")
+    ops.append("f Q")
+    return "\n".join(ops).encode()
+
+
+def add_qr_label_page(doc, text):
+    """Добавляет в doc страницу-этикетку с QR для text"""
+    page = doc.new_page(width=LABEL_WIDTH, height=LABEL_HEIGHT)
+    xref = doc.get_new_xref()
+    doc.update_object(xref, "<<>>")
+    doc.update_stream(xref, qr_content_stream(QR_RECT, LABEL_HEIGHT, text))
+    doc.xref_set_key(page.xref, "Contents", f"{xref} 0 R")
+    return page
+
+
+def build_qr_label(text):
+    """PDF (bytes) с одной этикеткой QR — без промежуточных файлов"""
+    doc = fitz.open()
+    try:
+        add_qr_label_page(doc, text)
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def build_qr_labels(texts):
+    """PDF (bytes) с этикетками QR для texts — по странице на этикетку, одним документом"""
+    doc = fitz.open()
+    try:
+        for text in texts:
+            add_qr_label_page(doc, text)
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+class QrLabelBatch:
+    """
+    Накопитель этикеток для пакетной печати. add() складывает элементы в пакет;
+    пакет отдаётся в on_flush(items) (из вызывающего потока или потока таймера),
+    когда набралось max_items элементов или прошло timeout секунд с первого элемента.
+    """
+
+    def __init__(self, on_flush, max_items=QR_BATCH_SIZE, timeout=QR_BATCH_TIMEOUT):
+        self.on_flush = on_flush
+        self.max_items = max_items
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._items = []
+        self._timer = None
+
+    def add(self, item):
+        """Добавляет элемент, возвращает размер пакета после добавления"""
+        with self._lock:
+            self._items.append(item)
+            size = len(self._items)
+            if size == 1 and size < self.max_items:
+                self._timer = threading.Timer(self.timeout, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if size >= self.max_items:
+            self.flush()
+        return size
+
+    def pending(self):
+        with self._lock:
+            return len(self._items)
+
+    def flush(self):
+        """Отдаёт накопленный пакет в on_flush. Возвращает количество элементов"""
+        with self._lock:
+            items, self._items = self._items, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if items:
+            self.on_flush(items)
+        return len(items)
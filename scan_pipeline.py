@@ -0,0 +1,70 @@
+import queue
+import threading
+
+from seller_supp_api import validate_order
+from task_executor import get_task_executor, TaskCancelled, PRIORITY_HIGH
+
+
+class ScanPipeline:
+    """
+    Конвейер сканирования для виджетов станций: поле ввода очищается сразу после Enter,
+    а проверка заказа (validate_order), поиск, печать и отправка выполняются в фоне.
+
+    Заказы проверяются параллельно в сетевой очереди общего пула задач, но дальше
+    обрабатываются строго в порядке сканирования одним потоком конвейера:
+    handle(order_number, *args) — для прошедших проверку,
+    on_rejected(order_number, message) — для не прошедших.
+    Оба обработчика вызываются из фонового потока — интерфейс обновляется через сигналы.
+    owner — владелец задач проверки в общем пуле (виджет), отменённые задачи пропускаются.
+    """
+
+    def __init__(self, handle, on_rejected, owner=None):
+        self.handle = handle
+        self.on_rejected = on_rejected
+        self.owner = owner
+        self._stopped = False
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="scan-pipeline", daemon=True)
+        self._thread.start()
+
+    def submit(self, order_number, is_employee_prepared_facade, *args):
+        """Ставит заказ в конвейер, возвращает количество необработанных заказов"""
+        task = get_task_executor().submit(
+            "network", validate_order, priority=PRIORITY_HIGH, owner=self.owner,
+            order_number=order_number, is_employee_prepared_facade=is_employee_prepared_facade,
+        )
+        self._queue.put((order_number, args, task))
+        return self._queue.qsize()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def stop(self):
+        """Останавливает конвейер: необработанные заказы отбрасываются, поток завершается"""
+        self._stopped = True
+        self._queue.put(None)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None or self._stopped:
+                self._queue.task_done()
+                if item is None:
+                    return
+                continue
+            order_number, args, task = item
+            try:
+                try:
+                    success, message = task.result()
+                except TaskCancelled:
+                    continue
+                except Exception as e:
+                    success, message = False, f"Ошибка проверки заказа: {e}"
+                if success:
+                    self.handle(order_number, *args)
+                else:
+                    self.on_rejected(order_number, message)
+            except Exception as e:
+                print(f"Ошибка обработки заказа {order_number}: {e}")
+            finally:
+                self._queue.task_done()
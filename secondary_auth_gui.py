@@ -2,7 +2,7 @@ from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import QTimer, Qt
 from seller_supp_api import authorize, get_workplaces, save_workplace, is_user_in_context, remove_user_from_context
-from pila_widget import PilaWidget
+from station_registry import open_station
 
 class SecondaryAuthWidget(QWidget):
     """Вторичная авторизация для специальных рабочих мест"""
@@ -109,9 +109,7 @@ class SecondaryAuthWidget(QWidget):
 
                     # Запуск PilaWidget, если рабочее место Пила-1 или Пила-2
                     if self.required_workplace in ["Пила-1", "Пила-2"]:
-                        pila_widget = PilaWidget()
-                        self.stacked_widget.addWidget(pila_widget)
-                        self.stacked_widget.setCurrentWidget(pila_widget)
+                        open_station(self.stacked_widget, self.required_workplace)
                     elif self.back_widget:
                         self.back_widget.load_workplaces()
                         self.stacked_widget.setCurrentWidget(self.back_widget)
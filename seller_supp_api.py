@@ -1,18 +1,175 @@
+import hashlib
+import io
+import json
 import os
 import sys
+import tempfile
+import threading
 import time
 import requests
-import winsound
+from requests.adapters import HTTPAdapter
+
+try:
+    import winsound
+except ImportError:  # не Windows — звуковой сигнал не воспроизводится
+    winsound = None
+
+from work_outbox import SendDeferred, WorkOutbox
 
 HOST = "http://localhost:8080"
-USER_CONTEXT = []  # [{username, token, token_timestamp, workplace}, ...]
 TOKEN_TTL = 12 * 60 * 60  # 12 часов
 
+
+class UserContext:
+    """
+    Потокобезопасное хранилище авторизованных пользователей.
+    Поиск по username — через словарь, читатели (рабочие потоки) получают
+    неизменяемые снимки, которые пересобираются при каждом изменении.
+    Объект создаётся один раз, поэтому `from seller_supp_api import USER_CONTEXT`
+    всегда видит актуальные данные.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = {}  # username -> {username, token, token_timestamp, workplace}
+        self._snapshot = ()
+        self._employees = ()
+
+    def _rebuild(self):
+        """Пересобирает снимки. Вызывается под self._lock"""
+        self._snapshot = tuple(dict(u) for u in self._users.values())
+        self._employees = tuple(
+            {"username": u["username"], "workplace": u["workplace"]}
+            for u in self._users.values()
+            if u["username"] and u["workplace"]
+        )
+
+    def get(self, username):
+        with self._lock:
+            user = self._users.get(username)
+            return dict(user) if user else None
+
+    def save_token(self, username, token):
+        with self._lock:
+            user = self._users.get(username)
+            if user:
+                user["token"] = token
+                user["token_timestamp"] = time.time()
+            else:
+                self._users[username] = {
+                    "username": username,
+                    "token": token,
+                    "token_timestamp": time.time(),
+                    "workplace": ""
+                }
+            self._rebuild()
+
+    def save_workplace(self, username, workplace):
+        with self._lock:
+            user = self._users.get(username)
+            if user:
+                user["workplace"] = workplace
+                self._rebuild()
+
+    def remove(self, username):
+        with self._lock:
+            if self._users.pop(username, None) is not None:
+                self._rebuild()
+
+    def snapshot(self):
+        """Неизменяемый снимок пользователей в порядке авторизации"""
+        return self._snapshot
+
+    def employees(self):
+        """Готовый список employees для work/process"""
+        return list(self._employees)
+
+    def first_username(self):
+        snapshot = self._snapshot
+        return snapshot[0]["username"] if snapshot else None
+
+    def __contains__(self, username):
+        return username in self._users
+
+    def __len__(self):
+        return len(self._snapshot)
+
+    def __iter__(self):
+        return iter(self._snapshot)
+
+
+USER_CONTEXT = UserContext()
+
+# Размер пула keep-alive соединений к HOST
+HTTP_POOL_SIZE = 10
+# Таймауты (сек.) по типам запросов
+HTTP_TIMEOUTS = {
+    "auth": 5,
+    "workplaces": 5,
+    "validation": 5,
+    "work_process": 5,
+    "packages": 300,
+    "package_by_order": 120,
+}
+
+# Потоковая загрузка PDF: размер порции, число докачек при обрыве, частота отчёта о прогрессе
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_PROGRESS_INTERVAL = 1.0
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+# Локальная очередь событий work/process лежит рядом с .exe (или исходником),
+# а не во временной папке PyInstaller, чтобы пережить перезапуск
+_app_dir = os.path.dirname(sys.executable) if getattr(sys, "frozen", False) \
+    else os.path.dirname(os.path.abspath(__file__))
+OUTBOX_PATH = os.path.join(_app_dir, "work_outbox.sqlite3")
+# Кэш PDF с этикетками: файлы по SHA-256 содержимого + валидаторы сервера (ETag/Last-Modified)
+PACKAGES_CACHE_DIR = os.path.join(_app_dir, "packages_cache")
+# Журнал консолей станций (ротируемый)
+CONSOLE_LOG_PATH = os.path.join(_app_dir, "logs", "console.log")
+
+_work_outbox = None
+_work_outbox_lock = threading.Lock()
+
+
+def get_http_session():
+    """
+    Общая HTTP-сессия с пулом keep-alive соединений.
+    Создаётся один раз и используется всеми потоками, чтобы каждое сканирование
+    не открывало новое TCP-соединение.
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.verify = False
+                _http_session = session
+    return _http_session
+
+
+def configure_http_session(pool_size=None, timeouts=None):
+    """
+    Меняет размер пула и/или таймауты. Текущая сессия закрывается,
+    следующая будет создана с новыми параметрами.
+    """
+    global HTTP_POOL_SIZE, _http_session
+    with _http_session_lock:
+        if pool_size is not None:
+            HTTP_POOL_SIZE = pool_size
+        if timeouts:
+            HTTP_TIMEOUTS.update(timeouts)
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
+
 def get_user_context(username):
-    for user in USER_CONTEXT:
-        if user["username"] == username:
-            return user
-    return None
+    return USER_CONTEXT.get(username)
 
 def get_cached_token(username):
     user = get_user_context(username)
@@ -21,32 +178,23 @@ def get_cached_token(username):
     return None
 
 def save_token(username, token):
-    user = get_user_context(username)
-    if user:
-        user["token"] = token
-        user["token_timestamp"] = time.time()
-    else:
-        USER_CONTEXT.append({
-            "username": username,
-            "token": token,
-            "token_timestamp": time.time(),
-            "workplace": ""
-        })
+    USER_CONTEXT.save_token(username, token)
 
 def save_workplace(username, workplace):
-    user = get_user_context(username)
-    if user:
-        user["workplace"] = workplace
+    USER_CONTEXT.save_workplace(username, workplace)
 
 def authorize(username, password):
     auth_url = f"{HOST}/auth"
     payload = {"username": username, "password": password}
     try:
-        resp = requests.post(auth_url, json=payload, verify=False, timeout=5)
+        resp = get_http_session().post(auth_url, json=payload, timeout=HTTP_TIMEOUTS["auth"])
         if resp.status_code == 200:
             token = resp.json().get("token") or resp.json().get("access_token")
             if token:
                 save_token(username, token)
+                # запускаем отправку событий, оставшихся в очереди с прошлого запуска,
+                # и возвращаем в очередь те, что не удалось отправить до входа
+                get_work_outbox().retry_failed()
                 return True, token
         elif resp.status_code == 401:
             play_notification_sound()
@@ -65,7 +213,7 @@ def get_workplaces(username):
     url = f"{HOST}/api/v1/admin/users/{username}/workplaces"
     headers = {"Authorization": f"Bearer {token}"}
     try:
-        resp = requests.get(url, headers=headers, verify=False, timeout=5)
+        resp = get_http_session().get(url, headers=headers, timeout=HTTP_TIMEOUTS["workplaces"])
         if resp.status_code == 200:
             data = resp.json()
             if isinstance(data, list) and data:
@@ -86,22 +234,21 @@ def validate_secondary_auth(username, selected_wp):
     return False, None, ""
 
 def is_user_in_context(username):
-    return any(u["username"] == username for u in USER_CONTEXT)
+    return username in USER_CONTEXT
 
 def remove_user_from_context(username):
-    global USER_CONTEXT
-    USER_CONTEXT = [u for u in USER_CONTEXT if u["username"] != username]
+    USER_CONTEXT.remove(username)
 
 def validate_order(order_number: str, is_employee_prepared_facade: bool):
     """
     Выполняет валидацию заказа.
     Возвращает (success: bool, message: Optional[str])
     """
-    if not USER_CONTEXT:
+    # Берем токен первого авторизованного пользователя (как send_work_process)
+    username = USER_CONTEXT.first_username()
+    if not username:
         return False, "Нет авторизованных пользователей."
 
-    # Берем токен первого авторизованного пользователя (как send_work_process)
-    username = USER_CONTEXT[0]["username"]
     token = get_cached_token(username)
     if not token:
         play_notification_sound()
@@ -118,7 +265,7 @@ def validate_order(order_number: str, is_employee_prepared_facade: bool):
     }
 
     try:
-        resp = requests.post(url, json=payload, headers=headers, verify=False, timeout=5)
+        resp = get_http_session().post(url, json=payload, headers=headers, timeout=HTTP_TIMEOUTS["validation"])
 
         # Если сервер прислал 200 OK → стандартный json ответ ResultInformationResponse
         if resp.status_code == 200:
@@ -144,31 +291,24 @@ def validate_order(order_number: str, is_employee_prepared_facade: bool):
         return False, f"Ошибка запроса: {e}"
 
 
-def send_work_process(order_number: str, operation_type: str):
+def _post_work_process(employees, order_number: str, operation_type: str):
     """
-    Отправка информации о выполненном объеме работы всех авторизованных пользователей.
+    Отправка информации о выполненном объеме работы на сервер.
     Обрабатывает ResultInformationResponse:
       message: str
       orderWasUpdated: bool
       needAlert: bool
+    Возвращает (delivered: bool, message: str, retry: bool)
+    Без токена поднимает SendDeferred: событие ждёт входа пользователя, попытка не засчитывается.
     """
-    if not USER_CONTEXT:
-        return False, "Нет авторизованных пользователей для отправки данных."
-
-    employees = []
-    for u in USER_CONTEXT:
-        if "username" in u and "workplace" in u and u["username"] and u["workplace"]:
-            employees.append({
-                "username": u["username"],
-                "workplace": u["workplace"]
-            })
-
-    if not employees:
-        return False, "Нет корректных пользователей для отправки."
-
-    token = get_cached_token(employees[0]["username"])
+    # событие могло остаться с прошлого запуска — подойдёт токен любого вошедшего сейчас
+    token = None
+    for username in [employee["username"] for employee in employees] + [user["username"] for user in USER_CONTEXT]:
+        token = get_cached_token(username)
+        if token:
+            break
     if not token:
-        return False, f"Нет токена для пользователя {employees[0]['username']}."
+        raise SendDeferred(f"Нет токена для пользователя {employees[0]['username']}.")
 
     url = f"{HOST}/api/v1/employees/work/process"
     headers = {
@@ -182,17 +322,20 @@ def send_work_process(order_number: str, operation_type: str):
     }
 
     try:
-        resp = requests.post(url, json=payload, headers=headers, verify=False, timeout=5)
+        resp = get_http_session().post(url, json=payload, headers=headers, timeout=HTTP_TIMEOUTS["work_process"])
 
         if resp.status_code != 200:
+            # 401 (токен истёк) и 5xx — временные ошибки, остальное сервер не примет и при повторе
+            if resp.status_code == 401 or resp.status_code >= 500:
+                return False, f"Ошибка сервера {resp.status_code}: {resp.text}", True
             play_notification_sound()
-            return False, f"Ошибка сервера {resp.status_code}: {resp.text}"
+            return False, f"Ошибка сервера {resp.status_code}: {resp.text}", False
 
         try:
             data = resp.json()
         except:
             play_notification_sound()
-            return False, "Ошибка: сервер вернул некорректный JSON."
+            return False, "Ошибка: сервер вернул некорректный JSON.", False
 
         message = data.get("message")
         order_was_updated = data.get("orderWasUpdated")
@@ -201,81 +344,337 @@ def send_work_process(order_number: str, operation_type: str):
         # 1) Если needAlert = true → звук + ошибка
         if need_alert:
             play_notification_sound()
-            return False, message or "Неизвестная ошибка"
+            return False, message or "Неизвестная ошибка", False
 
         # 2) Если needAlert = false и orderWasUpdated = true → успех
         if order_was_updated:
-            return True, "Данные успешно обработаны"
+            return True, "Данные успешно обработаны", False
 
         # 3) Если needAlert = false и orderWasUpdated = false → ошибка + message
-        return False, message or "Операция не выполнена"
+        return False, message or "Операция не выполнена", False
 
     except Exception as e:
-        play_notification_sound()
-        return False, f"Ошибка запроса: {e}"
+        return False, f"Ошибка запроса: {e}", True
+
+def _deliver_work_event(event):
+    return _post_work_process(event["employees"], event["order_number"], event["operation_type"])
+
+def get_work_outbox():
+    """Очередь отправки work/process (создаётся и запускается при первом обращении)"""
+    global _work_outbox
+    if _work_outbox is None:
+        with _work_outbox_lock:
+            if _work_outbox is None:
+                outbox = WorkOutbox(OUTBOX_PATH, _deliver_work_event)
+                outbox.start()
+                _work_outbox = outbox
+    return _work_outbox
 
-def download_packages(username: str, only_packaging_materials: bool):
+def send_work_process(order_number: str, operation_type: str):
     """
-    Загружает PDF с этикетками для указанного пользователя.
-    Возвращает (success: bool, message: str, pdf_bytes: Optional[bytes])
+    Записывает информацию о выполненном объеме работы всех авторизованных пользователей
+    в локальную очередь. Отправка на сервер выполняется фоновым потоком очереди,
+    результат приходит подписчикам get_work_outbox().add_listener(...).
+    """
+    if not USER_CONTEXT:
+        return False, "Нет авторизованных пользователей для отправки данных."
 
-    :param username: имя пользователя
-    :param only_packaging_materials: если True — загружает только упаковочные материалы
+    employees = USER_CONTEXT.employees()
+
+    if not employees:
+        return False, "Нет корректных пользователей для отправки."
+
+    try:
+        outbox = get_work_outbox()
+        outbox.append(order_number, operation_type, employees)
+        pending, failed = outbox.counts()
+    except Exception as e:
+        play_notification_sound()
+        return False, f"Ошибка записи в очередь отправки: {e}"
+
+    return True, f"Заказ {order_number} поставлен в очередь отправки (в очереди: {pending}, с ошибкой: {failed})"
+
+class IncompleteDownload(IOError):
+    """Загрузка оборвалась или сервер прислал не тот кусок файла"""
+
+def format_download_progress(received, total, speed):
+    """Строка прогресса загрузки для консоли виджетов"""
+    mb = 1024 * 1024
+    if total:
+        return f"⬇️ Загружено {received / mb:.1f} из {total / mb:.1f} МБ ({speed / mb:.1f} МБ/с)"
+    return f"⬇️ Загружено {received / mb:.1f} МБ ({speed / mb:.1f} МБ/с)"
+
+def _parse_content_range(value):
+    """'bytes start-end/total' → (start, total); total None, если сервер его не знает. None — не разобрать"""
+    try:
+        unit, spec = value.split(" ", 1)
+        span, total = spec.split("/", 1)
+        if unit != "bytes":
+            return None
+        return int(span.split("-", 1)[0]), None if total == "*" else int(total)
+    except ValueError:
+        return None
+
+def _stream_download(method, url, headers, timeout, out, progress=None):
+    """
+    Скачивает тело ответа порциями в файловый объект out, не держа весь ответ в памяти.
+    При обрыве соединения докачивает с места обрыва через HTTP Range с If-Range,
+    если сервер прислал Accept-Ranges: bytes и ETag/Last-Modified: изменившийся
+    за это время файл сервер отдаст целиком (200), и загрузка начнётся заново.
+    Ответ 206 принимается только с нужного байта, иначе загрузка тоже начинается заново.
+    Тело запрашивается без сжатия (Accept-Encoding: identity): Content-Length и Range считаются
+    в байтах передаваемого тела, а iter_content отдаёт уже распакованные. Если сервер всё же
+    сжал ответ, размер тела заранее не известен и докачка не используется.
+    progress(received, total, speed) вызывается не чаще раза в DOWNLOAD_PROGRESS_INTERVAL сек.
+    Возвращает ответ 200, если тело полностью записано в out, иначе — ответ с ошибкой
+    (его тело доступно через resp.text).
     """
+    session = get_http_session()
+    received = 0
+    total = None
+    validator = None  # ETag/Last-Modified первого ответа — для If-Range
+    full_resp = None  # ответ 200, с которого началась загрузка
+    attempt = 0
+    started = time.time()
+    last_report = 0.0
+
+    while True:
+        request_headers = dict(headers)
+        request_headers["Accept-Encoding"] = "identity"
+        if full_resp is not None and validator:
+            request_headers["Range"] = f"bytes={received}-"
+            request_headers["If-Range"] = validator
+        resp = None
+        try:
+            resp = session.request(method, url, headers=request_headers, timeout=timeout, stream=True)
+            if resp.status_code == 200:
+                # первый запрос, сервер проигнорировал Range или файл изменился — пишем с начала
+                out.seek(0)
+                out.truncate()
+                received = 0
+                length = resp.headers.get("Content-Length")
+                encoded = resp.headers.get("Content-Encoding", "identity").lower() != "identity"
+                # у сжатого ответа Content-Length — размер сжатого тела, а не записанных байт
+                total = int(length) if length and length.isdigit() and not encoded else None
+                full_resp = resp
+                validator = None
+                if resp.headers.get("Accept-Ranges", "").lower() == "bytes" and not encoded:
+                    # слабый ETag в If-Range не допускается
+                    etag = resp.headers.get("ETag")
+                    validator = etag if etag and not etag.startswith("W/") else resp.headers.get("Last-Modified")
+            elif resp.status_code == 206:
+                content_range = _parse_content_range(resp.headers.get("Content-Range", ""))
+                if full_resp is None or content_range is None or content_range[0] != received \
+                        or (total is not None and content_range[1] not in (None, total)):
+                    # не тот кусок — докачка невозможна, начинаем заново без Range
+                    validator = None
+                    full_resp = None
+                    raise IncompleteDownload(f"Сервер вернул не тот диапазон: {resp.headers.get('Content-Range')}")
+            elif full_resp is not None:
+                # ошибка при докачке — следующая попытка начнётся заново без Range
+                validator = None
+                full_resp = None
+                raise IncompleteDownload(f"Ошибка докачки: {resp.status_code}")
+            else:
+                resp.content  # дочитываем тело, чтобы resp.text был доступен после закрытия
+                return resp
+
+            for chunk in resp.iter_content(DOWNLOAD_CHUNK_SIZE):
+                out.write(chunk)
+                received += len(chunk)
+                now = time.time()
+                if progress and now - last_report >= DOWNLOAD_PROGRESS_INTERVAL:
+                    last_report = now
+                    progress(received, total, received / max(now - started, 1e-6))
+            if total is not None and received != total:
+                raise IncompleteDownload(f"Получено {received} из {total} байт")
+            if progress:
+                progress(received, total, received / max(time.time() - started, 1e-6))
+            return full_resp
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                IncompleteDownload):
+            attempt += 1
+            if attempt > DOWNLOAD_RETRIES:
+                raise
+            if not validator:
+                full_resp = None
+        finally:
+            if resp is not None:
+                resp.close()
+
+def _download_pdf(url, method, timeout_key, username, out, not_found_message, progress=None):
+    """Общая часть загрузок PDF. Возвращает (success: bool, message: Optional[str])"""
     token = get_cached_token(username)
     if not token:
         play_notification_sound()
-        return False, "❌ Нет токена. Авторизуйтесь заново.", None
+        return False, "❌ Нет токена. Авторизуйтесь заново."
 
-    # ✅ передаём параметр onlyPackagingMaterials в запрос
-    url = f"{HOST}/api/v1/orders/packages?onlyPackagingMaterials={'true' if only_packaging_materials else 'false'}"
     headers = {"Authorization": f"Bearer {token}"}
 
     try:
-        resp = requests.post(url, headers=headers, verify=False, timeout=300)
+        resp = _stream_download(method, url, headers, HTTP_TIMEOUTS[timeout_key], out, progress)
         if resp.status_code == 200:
-            return True, None, resp.content
+            return True, None
         elif resp.status_code == 404:
-            return False, "⚠️ Готовых к упаковке заказов не найдено", None
+            return False, not_found_message
         else:
             play_notification_sound()
-            return False, f"❌ Ошибка {resp.status_code}: {resp.text}", None
+            return False, f"❌ Ошибка {resp.status_code}: {resp.text}"
     except Exception as e:
         play_notification_sound()
-        return False, f"❌ Ошибка запроса: {e}", None
+        return False, f"❌ Ошибка запроса: {e}"
 
-def download_package_by_order(username: str, order_number: str):
+def _packages_url(only_packaging_materials: bool):
+    # ✅ передаём параметр onlyPackagingMaterials в запрос
+    return f"{HOST}/api/v1/orders/packages?onlyPackagingMaterials={'true' if only_packaging_materials else 'false'}"
+
+def _packages_cache_meta_path(username: str, only_packaging_materials: bool):
+    return os.path.join(
+        PACKAGES_CACHE_DIR, f"{username}_{'materials' if only_packaging_materials else 'all'}.json"
+    )
+
+def _load_packages_cache(username: str, only_packaging_materials: bool):
+    """Возвращает (meta, pdf_path) из кэша или (None, None)"""
+    try:
+        with open(_packages_cache_meta_path(username, only_packaging_materials), encoding="utf-8") as f:
+            meta = json.load(f)
+        pdf_path = os.path.join(PACKAGES_CACHE_DIR, f"{meta['sha256']}.pdf")
+        if os.path.exists(pdf_path):
+            return meta, pdf_path
+    except (OSError, ValueError, KeyError):
+        pass
+    return None, None
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _save_packages_cache(username: str, only_packaging_materials: bool, part_path: str, etag, last_modified):
     """
-    Загружает PDF с этикетками для указанного пользователя.
-    Возвращает (success: bool, message: str, pdf_bytes: Optional[bytes])
+    Переносит загруженный PDF в кэш под именем по SHA-256 содержимого и запоминает валидаторы
+    сервера. PDF, на которые не ссылается ни один пользователь, удаляются
+    (открытый сейчас файл Windows удалить не даст — он удалится при следующей загрузке).
+    Возвращает путь к PDF в кэше.
+    """
+    digest = _file_sha256(part_path)
+    pdf_path = os.path.join(PACKAGES_CACHE_DIR, f"{digest}.pdf")
+    if os.path.exists(pdf_path):
+        os.remove(part_path)
+    else:
+        os.replace(part_path, pdf_path)
+
+    meta_path = _packages_cache_meta_path(username, only_packaging_materials)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"sha256": digest, "etag": etag, "last_modified": last_modified}, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+    used = set()
+    for name in os.listdir(PACKAGES_CACHE_DIR):
+        if name.endswith(".json"):
+            try:
+                with open(os.path.join(PACKAGES_CACHE_DIR, name), encoding="utf-8") as f:
+                    used.add(json.load(f)["sha256"])
+            except (OSError, ValueError, KeyError):
+                pass
+    for name in os.listdir(PACKAGES_CACHE_DIR):
+        if name.endswith(".pdf") and name[:-4] not in used:
+            try:
+                os.remove(os.path.join(PACKAGES_CACHE_DIR, name))
+            except OSError:
+                pass
+    return pdf_path
+
+def download_packages_to_file(username: str, only_packaging_materials: bool, progress=None):
+    """
+    Загружает PDF с этикетками порциями сразу в файл кэша (PACKAGES_CACHE_DIR/<SHA-256>.pdf) —
+    память не зависит от размера PDF.
+    Запрос условный (If-None-Match/If-Modified-Since): если этикетки не изменились (304),
+    возвращается уже лежащий в кэше файл.
+    Возвращает (success: bool, message: str, pdf_path: Optional[str])
 
     :param username: имя пользователя
-    :param order_number: номер заказа, с которого требуется скачать этикетку
+    :param only_packaging_materials: если True — загружает только упаковочные материалы
+    :param progress: callback(received, total, speed) для отображения прогресса загрузки
     """
     token = get_cached_token(username)
     if not token:
         play_notification_sound()
         return False, "❌ Нет токена. Авторизуйтесь заново.", None
 
-    # ✅ передаём параметр order_number в запрос
-    url = f"{HOST}/api/v1/orders/{order_number}/package"
     headers = {"Authorization": f"Bearer {token}"}
-
+    meta, cached_path = _load_packages_cache(username, only_packaging_materials)
+    if meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    part_path = None
     try:
-        resp = requests.get(url, headers=headers, verify=False, timeout=120)
-        if resp.status_code == 200:
-            return True, None, resp.content
+        os.makedirs(PACKAGES_CACHE_DIR, exist_ok=True)
+        fd, part_path = tempfile.mkstemp(suffix=".part", dir=PACKAGES_CACHE_DIR)
+        with os.fdopen(fd, "w+b") as f:
+            resp = _stream_download(
+                "POST", _packages_url(only_packaging_materials), headers, HTTP_TIMEOUTS["packages"], f, progress
+            )
+        if resp.status_code == 304 and cached_path is not None:
+            return True, "♻️ Этикетки не изменились, используется локальная копия", cached_path
+        elif resp.status_code == 200:
+            pdf_path = _save_packages_cache(
+                username, only_packaging_materials, part_path,
+                resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+            )
+            return True, None, pdf_path
         elif resp.status_code == 404:
-            return False, f"⚠️ Заказ не был найден по номеру {order_number}", None
+            return False, "⚠️ Готовых к упаковке заказов не найдено", None
         else:
             play_notification_sound()
             return False, f"❌ Ошибка {resp.status_code}: {resp.text}", None
     except Exception as e:
         play_notification_sound()
         return False, f"❌ Ошибка запроса: {e}", None
+    finally:
+        if part_path and os.path.exists(part_path):
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+
+def download_packages(username: str, only_packaging_materials: bool, progress=None):
+    """
+    То же, что download_packages_to_file, но PDF возвращается в памяти.
+    Возвращает (success: bool, message: str, pdf_bytes: Optional[bytes])
+    """
+    success, message, pdf_path = download_packages_to_file(username, only_packaging_materials, progress)
+    if not success:
+        return success, message, None
+    with open(pdf_path, "rb") as f:
+        return success, message, f.read()
+
+def download_package_by_order(username: str, order_number: str):
+    """
+    Загружает PDF с этикетками для указанного пользователя.
+    Возвращает (success: bool, message: str, pdf_bytes: Optional[bytes])
+
+    :param username: имя пользователя
+    :param order_number: номер заказа, с которого требуется скачать этикетку
+    """
+    # ✅ передаём параметр order_number в запрос
+    url = f"{HOST}/api/v1/orders/{order_number}/package"
+    buffer = io.BytesIO()
+    success, message = _download_pdf(
+        url, "GET", "package_by_order", username, buffer,
+        f"⚠️ Заказ не был найден по номеру {order_number}"
+    )
+    return success, message, buffer.getvalue() if success else None
 
 def play_notification_sound():
     """Проигрывает звуковой сигнал (работает и в .exe)"""
+    if winsound is None:
+        return
     try:
         # Путь до папки, где лежит .exe или исходник
         base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,97 @@
+import importlib
+import threading
+
+# Рабочее место → (модуль, класс виджета станции).
+# Модули станций тянут fitz, qrcode, PIL и win32api, поэтому импортируются только
+# при выборе рабочего места (или заранее в фоне после входа — prewarm_stations).
+# При добавлении станции модуль нужно дописать в hiddenimports auth_gui.spec.
+STATION_WIDGETS = {
+    "Пила-мастер": ("pila_widget", "PilaWidget"),
+    "Пила-1": ("pila_widget", "PilaWidget"),
+    "Пила-2": ("pila_widget", "PilaWidget"),
+    "Кромщик": ("kromka_widget", "KromkaWidget"),
+    "ЧПУ": ("chpu_widget", "ChpuWidget"),
+    "Упаковщик": ("upakovka_widget", "UpakovkaWidget"),
+    "Упаковщик мебели": ("upakovka_mebel_widget", "UpakovkaMebelWidget"),
+}
+
+
+def has_station(workplace):
+    return workplace in STATION_WIDGETS
+
+
+def load_station_class(workplace):
+    """Класс виджета станции (модуль импортируется при первом обращении)"""
+    module_name, class_name = STATION_WIDGETS[workplace]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_station_widget(workplace):
+    return load_station_class(workplace)()
+
+
+def is_station_widget(widget):
+    return type(widget).__module__ in {module_name for module_name, _ in STATION_WIDGETS.values()}
+
+
+def remove_page(stacked_widget, page):
+    """Убирает страницу из стека и освобождает её ресурсы (dispose у станций)"""
+    stacked_widget.removeWidget(page)
+    dispose = getattr(page, "dispose", None)
+    if dispose:
+        dispose()
+    page.deleteLater()
+
+
+def show_page(stacked_widget, widget):
+    """Показывает widget, удаляя из стека прежние страницы того же типа (например, после повторного входа)"""
+    for index in reversed(range(stacked_widget.count())):
+        page = stacked_widget.widget(index)
+        if page is not widget and type(page) is type(widget):
+            remove_page(stacked_widget, page)
+    if stacked_widget.indexOf(widget) < 0:
+        stacked_widget.addWidget(widget)
+    stacked_widget.setCurrentWidget(widget)
+
+
+def open_station(stacked_widget, workplace):
+    """
+    Показывает станцию для workplace. Уже открытый виджет того же класса переиспользуется
+    (загруженные этикетки сохраняются), виджеты других станций освобождаются.
+    """
+    station_class = load_station_class(workplace)
+    station = None
+    for index in reversed(range(stacked_widget.count())):
+        page = stacked_widget.widget(index)
+        if not is_station_widget(page):
+            continue
+        if station is None and type(page) is station_class:
+            station = page
+        else:
+            remove_page(stacked_widget, page)
+    if station is None:
+        station = station_class()
+        stacked_widget.addWidget(station)
+    stacked_widget.setCurrentWidget(station)
+    return station
+
+
+def prewarm_stations(workplaces):
+    """
+    Фоном импортирует модули станций для workplaces, чтобы виджет открылся без задержки.
+    Импорт идёт под блокировкой модуля, поэтому одновременный выбор станции просто дождётся его.
+    """
+    module_names = []
+    for workplace in workplaces:
+        if workplace in STATION_WIDGETS and STATION_WIDGETS[workplace][0] not in module_names:
+            module_names.append(STATION_WIDGETS[workplace][0])
+
+    def worker():
+        for module_name in module_names:
+            try:
+                importlib.import_module(module_name)
+            except Exception as e:
+                print(f"⚠️ Не удалось заранее загрузить {module_name}: {e}")
+
+    if module_names:
+        threading.Thread(target=worker, name="stations-prewarm", daemon=True).start()
@@ -0,0 +1,202 @@
+import itertools
+import queue
+import threading
+
+# Очереди фоновых задач и количество потоков каждой: число потоков приложения
+# не растёт при всплесках сканирования — лишние задачи просто ждут в очереди
+TASK_QUEUES = {
+    "network": 4,  # запросы к API и загрузки
+    "pdf": 2,  # разбор, индексация и подготовка PDF
+    "print": 1,  # подготовка заданий печати
+}
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+TASK_PENDING = "pending"
+TASK_RUNNING = "running"
+TASK_DONE = "done"
+TASK_FAILED = "failed"
+TASK_CANCELLED = "cancelled"
+
+
+class TaskCancelled(Exception):
+    """Задача отменена до запуска"""
+
+
+class Task:
+    def __init__(self, task_id, queue_name, fn, args, kwargs, priority, owner):
+        self.id = task_id
+        self.queue_name = queue_name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.owner = owner
+        self.status = TASK_PENDING
+        self.error = None
+        self._result = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def cancel(self):
+        """Отменяет задачу, если она ещё не запущена. Возвращает True при успехе"""
+        with self._lock:
+            if self.status != TASK_PENDING:
+                return False
+            self.status = TASK_CANCELLED
+        self._done.set()
+        return True
+
+    def _start(self):
+        with self._lock:
+            if self.status != TASK_PENDING:
+                return False
+            self.status = TASK_RUNNING
+            return True
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Ждёт завершения задачи и возвращает её результат (или поднимает её исключение)"""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Задача {self.id} не завершилась за {timeout} с")
+        if self.status == TASK_CANCELLED:
+            raise TaskCancelled(f"Задача {self.id} отменена")
+        if self.error is not None:
+            raise self.error
+        return self._result
+
+
+class _TaskQueue:
+    """Именованная очередь с приоритетами и фиксированным числом потоков"""
+
+    def __init__(self, name, workers, on_finished):
+        self.name = name
+        self.on_finished = on_finished
+        self.workers = workers
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self._queue = queue.PriorityQueue()
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"task-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, task):
+        # внутри одного приоритета — по порядку постановки
+        self._queue.put((task.priority, task.id, task))
+
+    def _run(self):
+        while True:
+            _, _, task = self._queue.get()
+            if not task._start():
+                with self._lock:
+                    self.cancelled += 1
+                self.on_finished(task)
+                continue
+            with self._lock:
+                self.running += 1
+            try:
+                task._result = task.fn(*task.args, **task.kwargs)
+                task.status = TASK_DONE
+            except Exception as e:
+                task.error = e
+                task.status = TASK_FAILED
+                print(f"Ошибка фоновой задачи {task.queue_name}#{task.id}: {e}")
+            finally:
+                # задача больше не держит свои аргументы (PDF, документы)
+                task.fn = task.args = task.kwargs = None
+                with self._lock:
+                    self.running -= 1
+                    if task.status == TASK_DONE:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+                task._done.set()
+                self.on_finished(task)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._queue.qsize(),
+                "running": self.running,
+                "done": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+            }
+
+
+class TaskExecutor:
+    """
+    Общий пул фоновых задач приложения вместо отдельного потока на каждое действие.
+    Задачи ставятся в именованные очереди (TASK_QUEUES), внутри очереди выполняются
+    по приоритету, затем по порядку постановки. Задачи владельца (виджета)
+    можно отменить разом — например, при его закрытии.
+    """
+
+    def __init__(self, queues=None):
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending = {}  # task_id -> Task, ещё не завершённые задачи
+        self._queues = {
+            name: _TaskQueue(name, workers, self._finished)
+            for name, workers in (queues or TASK_QUEUES).items()
+        }
+
+    def submit(self, queue_name, fn, *args, priority=PRIORITY_NORMAL, owner=None, **kwargs):
+        task_queue = self._queues[queue_name]
+        task = Task(next(self._ids), queue_name, fn, args, kwargs, priority, owner)
+        with self._lock:
+            self._pending[task.id] = task
+        task_queue.put(task)
+        return task
+
+    def cancel(self, owner):
+        """Отменяет все ещё не запущенные задачи владельца. Возвращает их количество"""
+        cancelled = 0
+        with self._lock:
+            tasks = [task for task in self._pending.values() if task.owner is owner]
+        for task in tasks:
+            if task.cancel():
+                cancelled += 1
+        return cancelled
+
+    def _finished(self, task):
+        with self._lock:
+            self._pending.pop(task.id, None)
+
+    def metrics(self):
+        """Глубина и счётчики каждой очереди: {имя: {workers, pending, running, done, failed, cancelled}}"""
+        return {name: task_queue.metrics() for name, task_queue in self._queues.items()}
+
+
+def format_task_metrics(metrics):
+    """Строка для отладочного вывода состояния очередей"""
+    return " | ".join(
+        f"{name}: в очереди {m['pending']}, выполняется {m['running']}/{m['workers']}, "
+        f"готово {m['done']}, ошибок {m['failed']}, отменено {m['cancelled']}"
+        for name, m in metrics.items()
+    )
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_task_executor():
+    """Общий пул фоновых задач (создаётся при первом обращении)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = TaskExecutor()
+    return _executor
@@ -0,0 +1,136 @@
+import gzip
+import hashlib
+import http.server
+import json
+import os
+import threading
+
+import pytest
+
+import seller_supp_api
+
+
+class PackagesServer(http.server.ThreadingHTTPServer):
+    """Заглушка сервера этикеток: отдаёт body с ETag, на совпавший If-None-Match — 304"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), PackagesHandler)
+        self.body = b"%PDF-1.4 first"
+        self.etag = '"v1"'
+        self.gzip = False  # сжимать тело gzip независимо от Accept-Encoding запроса
+        self.requests = []  # (статус ответа, заголовки запроса)
+
+
+class PackagesHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        if self.headers.get("If-None-Match") == server.etag:
+            server.requests.append((304, dict(self.headers)))
+            self.send_response(304)
+            self.send_header("ETag", server.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        server.requests.append((200, dict(self.headers)))
+        body = gzip.compress(server.body) if server.gzip else server.body
+        self.send_response(200)
+        self.send_header("ETag", server.etag)
+        self.send_header("Accept-Ranges", "bytes")
+        if server.gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    server = PackagesServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(seller_supp_api, "HOST", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(seller_supp_api, "PACKAGES_CACHE_DIR", str(tmp_path / "packages_cache"))
+    seller_supp_api.USER_CONTEXT.save_token("packer", "token")
+    yield server
+    seller_supp_api.USER_CONTEXT.remove("packer")
+    server.shutdown()
+    server.server_close()
+
+
+def cached_pdfs():
+    return sorted(name for name in os.listdir(seller_supp_api.PACKAGES_CACHE_DIR) if name.endswith(".pdf"))
+
+
+def test_first_download_is_cached_by_sha256(server):
+    success, message, pdf_path = seller_supp_api.download_packages_to_file("packer", False)
+
+    assert success
+    digest = hashlib.sha256(server.body).hexdigest()
+    assert os.path.basename(pdf_path) == f"{digest}.pdf"
+    with open(pdf_path, "rb") as f:
+        assert f.read() == server.body
+    with open(os.path.join(seller_supp_api.PACKAGES_CACHE_DIR, "packer_all.json"), encoding="utf-8") as f:
+        assert json.load(f) == {"sha256": digest, "etag": '"v1"', "last_modified": None}
+    assert [name for name in os.listdir(seller_supp_api.PACKAGES_CACHE_DIR) if name.endswith(".part")] == []
+
+
+def test_not_modified_reuses_cached_pdf(server):
+    _, _, first_path = seller_supp_api.download_packages_to_file("packer", False)
+    success, message, pdf_path = seller_supp_api.download_packages_to_file("packer", False)
+
+    assert success
+    assert pdf_path == first_path
+    assert message.startswith("♻️")
+    status, headers = server.requests[-1]
+    assert status == 304
+    assert headers["If-None-Match"] == '"v1"'
+    # контракт с bytes тоже отдаёт локальную копию
+    assert seller_supp_api.download_packages("packer", False) == (True, message, server.body)
+
+
+def test_changed_pdf_replaces_and_prunes_old_copy(server):
+    _, _, old_path = seller_supp_api.download_packages_to_file("packer", False)
+    server.body = b"%PDF-1.4 second"
+    server.etag = '"v2"'
+
+    success, message, new_path = seller_supp_api.download_packages_to_file("packer", False)
+
+    assert success and message is None
+    assert server.requests[-1][0] == 200
+    assert not os.path.exists(old_path)
+    assert cached_pdfs() == [os.path.basename(new_path)]
+
+
+def test_pdf_still_used_by_other_kind_is_kept(server):
+    _, _, shared_path = seller_supp_api.download_packages_to_file("packer", True)
+    server.body = b"%PDF-1.4 all packages"
+    server.etag = '"v2"'
+
+    _, _, all_path = seller_supp_api.download_packages_to_file("packer", False)
+
+    assert cached_pdfs() == sorted([os.path.basename(shared_path), os.path.basename(all_path)])
+
+
+def test_pdf_is_requested_without_compression(server):
+    seller_supp_api.download_packages_to_file("packer", False)
+
+    assert server.requests[-1][1]["Accept-Encoding"] == "identity"
+
+
+def test_gzip_encoded_response_is_decoded_and_complete(server):
+    # сервер сжимает ответ вопреки Accept-Encoding: Content-Length — размер сжатого тела
+    server.gzip = True
+    server.body = b"%PDF-1.4 " + b"0" * 100000
+
+    success, message, pdf_bytes = seller_supp_api.download_package_by_order("packer", "123-1")
+
+    assert (success, message) == (True, None)
+    assert pdf_bytes == server.body
+    assert len(server.requests) == 1
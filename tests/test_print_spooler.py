@@ -0,0 +1,185 @@
+import os
+import threading
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+import print_spooler
+from print_spooler import (
+    JOB_DONE, JOB_FAILED, JOB_PRINTING, JOB_QUEUED,
+    FileSinkBackend, RasterBackend, configure_print_spooler, print_with_file,
+)
+
+# 58×40 мм в пунктах
+LABEL_WIDTH = 58 * 72 / 25.4
+LABEL_HEIGHT = 40 * 72 / 25.4
+
+
+def labels_pdf(pages):
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=LABEL_WIDTH, height=LABEL_HEIGHT)
+        page.insert_text((10, 30), f"{10000000 + page_num}-1")
+    return doc.tobytes()
+
+
+class FlakyBackend:
+    """Бэкенд с print_file: первые fail_times заданий не печатаются, сбой — исключением или False"""
+    keep_files = False
+
+    def __init__(self, fail_times, error=None):
+        self.fail_times = fail_times
+        self.error = error
+        self.calls = 0
+
+    def print_file(self, path):
+        self.calls += 1
+        if self.calls <= self.fail_times:
+            if self.error:
+                raise self.error
+            return False
+        return True
+
+
+@pytest.fixture
+def spooler(monkeypatch):
+    """configure_print_spooler(backend) без пауз между повторами; общая очередь восстанавливается"""
+    monkeypatch.setattr(print_spooler, "_spooler", None)
+    monkeypatch.setattr(print_spooler, "PRINT_RETRY_DELAY", 0)
+    return configure_print_spooler
+
+
+def run_jobs(spooler, jobs):
+    """Ставит задания (pdf_bytes, name) в очередь и ждёт итогового статуса каждого; возвращает историю статусов"""
+    history = {}
+    finished = threading.Semaphore(0)
+
+    def on_status(job):
+        history.setdefault(job.id, []).append(job.status)
+        if job.status in (JOB_DONE, JOB_FAILED):
+            finished.release()
+
+    submitted = [spooler.submit(pdf_bytes, name, on_status) for pdf_bytes, name in jobs]
+    for _ in submitted:
+        assert finished.acquire(timeout=10), "задание печати не завершилось"
+    return submitted, history
+
+
+def test_file_sink_backend_copies_jobs_in_order(tmp_path):
+    backend = FileSinkBackend(str(tmp_path / "sink"))
+
+    assert print_with_file(backend, b"%PDF first", "a.pdf")
+    assert print_with_file(backend, b"%PDF second", "b.pdf")
+
+    files = sorted(os.listdir(tmp_path / "sink"))
+    assert [name.split("_", 1)[0] for name in files] == ["000001", "000002"]
+    assert [name.endswith(suffix) for name, suffix in zip(files, ("a.pdf", "b.pdf"))] == [True, True]
+    assert (tmp_path / "sink" / files[1]).read_bytes() == b"%PDF second"
+
+
+def test_print_with_file_removes_temp_file(tmp_path, monkeypatch):
+    paths = []
+    backend = FileSinkBackend(str(tmp_path / "sink"))
+    print_file = backend.print_file
+    monkeypatch.setattr(backend, "print_file", lambda path: paths.append(path) or print_file(path))
+
+    print_with_file(backend, b"%PDF", "label.pdf")
+
+    assert len(paths) == 1 and not os.path.exists(paths[0])
+
+
+@pytest.mark.parametrize("dpi", [203, 300])
+def test_raster_backend_writes_one_png_per_page_at_dpi(tmp_path, dpi):
+    backend = RasterBackend(dpi=dpi, sink_dir=str(tmp_path / "raster"))
+
+    assert backend.print_bytes(labels_pdf(3), "labels")
+
+    files = sorted(os.listdir(tmp_path / "raster"))
+    assert files == ["000001_labels.png", "000002_labels.png", "000003_labels.png"]
+    for name in files:
+        pix = fitz.Pixmap(str(tmp_path / "raster" / name))
+        # fitz округляет размер растра до целого пикселя наружу
+        assert abs(pix.width - LABEL_WIDTH * dpi / 72) < 1
+        assert abs(pix.height - LABEL_HEIGHT * dpi / 72) < 1
+        assert (pix.xres, pix.yres) == (dpi, dpi)
+        assert pix.n == 1  # оттенки серого, без альфа-канала
+
+
+@pytest.mark.parametrize("outcome", [RuntimeError("нет принтера"), False])
+def test_raster_backend_falls_back_to_file_backend(tmp_path, monkeypatch, outcome):
+    fallback = FileSinkBackend(str(tmp_path / "viewer"))
+    backend = RasterBackend(sink_dir=str(tmp_path / "raster"), fallback=fallback)
+
+    def broken_raster(pdf_bytes, name):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(backend, "_print_raster", broken_raster)
+    pdf_bytes = labels_pdf(1)
+
+    assert backend.print_bytes(pdf_bytes, "label.pdf")
+
+    files = os.listdir(tmp_path / "viewer")
+    assert len(files) == 1
+    assert (tmp_path / "viewer" / files[0]).read_bytes() == pdf_bytes
+    assert os.listdir(tmp_path / "raster") == []
+
+
+def test_raster_backend_without_fallback_reports_failure(tmp_path, monkeypatch):
+    backend = RasterBackend(sink_dir=str(tmp_path / "raster"))
+    monkeypatch.setattr(backend, "_print_raster", lambda pdf_bytes, name: False)
+    assert backend.print_bytes(b"%PDF", "label.pdf") is False
+
+    monkeypatch.setattr(backend, "_print_raster", lambda pdf_bytes, name: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        backend.print_bytes(b"%PDF", "label.pdf")
+
+
+def test_spooler_prints_jobs_in_fifo_order(spooler, tmp_path):
+    sink = tmp_path / "sink"
+    jobs = [(f"%PDF job {n}".encode(), f"label_{n}.pdf") for n in range(5)]
+
+    submitted, history = run_jobs(spooler(FileSinkBackend(str(sink))), jobs)
+
+    files = sorted(os.listdir(sink))
+    assert [(sink / name).read_bytes() for name in files] == [pdf_bytes for pdf_bytes, _ in jobs]
+    assert all(file_name.endswith(f"_{name}") for file_name, (_, name) in zip(files, jobs))
+    for job in submitted:
+        assert history[job.id] == [JOB_QUEUED, JOB_PRINTING, JOB_DONE]
+        assert job.attempts == 1
+        assert job.pdf_bytes is None  # завершённое задание не держит PDF в памяти
+
+
+def test_spooler_retries_failed_job(spooler):
+    backend = FlakyBackend(fail_times=1)
+
+    (job,), history = run_jobs(spooler(backend, retries=1), [(b"%PDF", "label.pdf")])
+
+    assert history[job.id] == [JOB_QUEUED, JOB_PRINTING, JOB_DONE]
+    assert job.attempts == 2
+    assert backend.calls == 2
+
+
+def test_spooler_marks_job_failed_after_retries(spooler):
+    backend = FlakyBackend(fail_times=10, error=OSError("принтер недоступен"))
+
+    (job,), history = run_jobs(spooler(backend, retries=2), [(b"%PDF", "label.pdf")])
+
+    assert history[job.id] == [JOB_QUEUED, JOB_PRINTING, JOB_FAILED]
+    assert job.attempts == 3
+    assert job.error == "принтер недоступен"
+    assert job.pdf_bytes is None
+
+
+def test_failed_job_does_not_block_next_jobs(spooler, tmp_path):
+    sink = FileSinkBackend(str(tmp_path / "sink"))
+    backend = FlakyBackend(fail_times=1)
+    backend.print_file = lambda path, print_file=backend.print_file: print_file(path) and sink.print_file(path)
+
+    submitted, history = run_jobs(spooler(backend, retries=0), [(b"%PDF one", "a.pdf"), (b"%PDF two", "b.pdf")])
+
+    assert [history[job.id][-1] for job in submitted] == [JOB_FAILED, JOB_DONE]
+    files = os.listdir(tmp_path / "sink")
+    assert len(files) == 1 and files[0].endswith("b.pdf")
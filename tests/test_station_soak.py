@@ -0,0 +1,159 @@
+import http.server
+import importlib
+import json
+import os
+import threading
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+fitz = pytest.importorskip("fitz")
+QtCore = pytest.importorskip("PyQt5.QtCore")
+QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+
+import log_view
+import seller_supp_api
+import station_registry
+from auth_gui import AuthGUI
+from workplaces_choice import WorkplacesChoiceWidget
+
+CYCLES = 100
+WARMUP_CYCLES = 10
+# Допустимый рост RSS за циклы после прогрева
+RSS_GROWTH_LIMIT = 20 * 1024 * 1024
+WORKPLACES = ["Упаковщик", "Пила-мастер"]
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def labels_pdf(pages=300):
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=200, height=120)
+        page.insert_text((10, 30), f"{10000000 + page_num}-1")
+        page.insert_text((10, 60), f"Клиент {page_num:04d}")
+    return doc.tobytes()
+
+
+class StationServer(http.server.ThreadingHTTPServer):
+    """Заглушка сервера: вход, рабочие места и PDF этикеток (с ETag, повторно — 304)"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StationHandler)
+        self.pdf = labels_pdf()
+
+
+class StationHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, status, body=b"", content_type="application/json", headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.endswith("/workplaces"):
+            self.send_body(200, json.dumps(WORKPLACES).encode())
+        else:
+            self.send_body(404)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path == "/auth":
+            self.send_body(200, json.dumps({"token": "token"}).encode())
+        elif self.path.startswith("/api/v1/orders/packages"):
+            if self.headers.get("If-None-Match") == '"labels"':
+                self.send_body(304, headers=[("ETag", '"labels"')])
+            else:
+                self.send_body(200, self.server.pdf, "application/pdf", [("ETag", '"labels"')])
+        else:
+            self.send_body(404)
+
+
+@pytest.fixture
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    server = StationServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(seller_supp_api, "HOST", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(seller_supp_api, "PACKAGES_CACHE_DIR", str(tmp_path / "packages_cache"))
+    monkeypatch.setattr(seller_supp_api, "OUTBOX_PATH", str(tmp_path / "work_outbox.sqlite3"))
+    monkeypatch.setattr(seller_supp_api, "_work_outbox", None)
+    monkeypatch.setattr(log_view, "CONSOLE_LOG_PATH", str(tmp_path / "logs" / "console.log"))
+    monkeypatch.setattr(log_view, "_file_logger", None)
+    # модули станций импортируются при выборе рабочего места — кэш этикеток им тоже подменяем
+    for workplace in WORKPLACES:
+        module = importlib.import_module(station_registry.load_station_class(workplace).__module__)
+        if hasattr(module, "PACKAGES_CACHE_DIR"):
+            monkeypatch.setattr(module, "PACKAGES_CACHE_DIR", str(tmp_path / "packages_cache"))
+    yield server
+    seller_supp_api.USER_CONTEXT.remove("packer")
+    server.shutdown()
+    server.server_close()
+
+
+def wait_until(app, condition, timeout=30):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "не дождались"
+        app.processEvents()
+        time.sleep(0.01)
+
+
+def login_and_open(app, window, workplace):
+    """Один цикл: вход на странице авторизации → выбор рабочего места → станция"""
+    window.stack.setCurrentWidget(window.auth_page)
+    window.auth_page.username_input.setText("packer")
+    window.auth_page.password_input.setText("secret")
+    window.auth_page.handle_login()
+    choice = window.stack.currentWidget()
+    assert isinstance(choice, WorkplacesChoiceWidget)
+    choice.combo.setCurrentText(workplace)
+    choice.confirm_selection()
+    station = window.stack.currentWidget()
+    if hasattr(station, "fetch_labels_from_server"):
+        station.fetch_labels_from_server()
+        wait_until(app, lambda: station.labels is not None and station.labels.fully_indexed())
+    app.processEvents()
+    # убранные из стека страницы удаляются (deleteLater) при возврате в цикл событий
+    app.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+    return station
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="RSS читается из /proc")
+def test_login_workplace_cycles_keep_memory_flat(app, server):
+    window = AuthGUI()
+    window.show()
+
+    baseline = None
+    for cycle in range(CYCLES):
+        login_and_open(app, window, WORKPLACES[cycle % len(WORKPLACES)])
+        # авторизация, выбор рабочего места и одна станция — старые страницы не копятся
+        assert window.stack.count() <= 3
+        if cycle + 1 == WARMUP_CYCLES:
+            app.processEvents()
+            baseline = rss_bytes()
+            threads = threading.active_count()
+
+    app.processEvents()
+    growth = rss_bytes() - baseline
+    assert growth < RSS_GROWTH_LIMIT, f"RSS вырос на {growth / (1024 * 1024):.1f} МБ"
+    assert threading.active_count() <= threads + 2
+
+    window.close()
@@ -1,21 +1,23 @@
-import re
-import sys
-import fitz
-import tempfile
 import os
 import threading
-import platform
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QPushButton, QLineEdit, QTextEdit,
+    QWidget, QVBoxLayout, QPushButton, QLineEdit,
     QMessageBox, QLabel, QCheckBox, QHBoxLayout
 )
 from PyQt5.QtGui import QFont
-from PyQt5.QtCore import pyqtSignal, QObject
-from seller_supp_api import download_packages, send_work_process, USER_CONTEXT, \
-    validate_order, download_package_by_order  # импортируем методы и контекст
+from PyQt5.QtCore import pyqtSignal, QObject, QTimer
+from label_cache import format_cache_stats
+from label_store import LabelGeneration, build_label_generation, format_order_changes, order_changes
+from log_view import LogView
+from print_spooler import get_print_spooler, JOB_DONE, JOB_FAILED
+from scan_pipeline import ScanPipeline
+from task_executor import get_task_executor, PRIORITY_LOW
+from seller_supp_api import download_packages_to_file, send_work_process, USER_CONTEXT, \
+    download_package_by_order, get_work_outbox, format_download_progress, \
+    PACKAGES_CACHE_DIR  # импортируем методы и контекст
 
-if platform.system() == "Windows":
-    import win32api
+# Плановое обновление этикеток в фоне, минут (0 — только по кнопке)
+LABELS_REFRESH_INTERVAL_MIN = 30
 
 
 class WorkerSignals(QObject):
@@ -146,20 +148,17 @@ class UpakovkaMebelWidget(QWidget):
         self.console_label.setFont(font)
         self.layout.addWidget(self.console_label)
 
-        self.results = QTextEdit()
+        self.results = LogView("Упаковка мебели")
         self.results.setFont(font)
-        self.results.setReadOnly(True)
         self.results.setStyleSheet("""
-            QTextEdit { border: 1px solid #CCCCCC; border-radius: 8px; padding: 6px; background-color: #FAFAFA; }
+            QPlainTextEdit { border: 1px solid #CCCCCC; border-radius: 8px; padding: 6px; background-color: #FAFAFA; }
         """)
         self.layout.addWidget(self.results)
 
         self.setLayout(self.layout)
-        self.doc = None
-        self.pages_text = None
-
-        self.single_doc = None
-        self.single_pages_text = None
+        self.labels = None  # текущее поколение этикеток (LabelGeneration), заменяется целиком
+        self.single_labels = None  # этикетка заказа, загруженная по номеру
+        self.refresh_lock = threading.Lock()
 
         # Инициализация сигналов и подключение к слотам GUI
         self.signals = WorkerSignals()
@@ -168,12 +167,44 @@ class UpakovkaMebelWidget(QWidget):
         self.signals.set_path.connect(self.path_input.setText)
         # show_warning -> вызываем QMessageBox.warning в GUI-потоке
         self.signals.show_warning.connect(lambda title, msg: QMessageBox.warning(self, title, msg))
+        # Результаты фоновой отправки work/process из очереди
+        get_work_outbox().add_listener(self.on_work_process_result)
+        # Проверка, поиск и печать отсканированных заказов в фоне, по порядку сканирования
+        self.scan_pipeline = ScanPipeline(self.process_scan, self.on_order_rejected, owner=self)
+        # Плановое обновление загруженных этикеток
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.scheduled_refresh)
+        if LABELS_REFRESH_INTERVAL_MIN > 0:
+            self.refresh_timer.start(LABELS_REFRESH_INTERVAL_MIN * 60 * 1000)
 
     # === GUI-методы (слоты) ===
     def append_console(self, text):
         """Добавление строки в консоль (GUI-поток)"""
-        self.results.append(text)
-        self.results.verticalScrollBar().setValue(self.results.verticalScrollBar().maximum())
+        self.results.append_line(text)
+
+    def on_work_process_result(self, order_number, success, message):
+        """Результат отправки события из очереди (вызывается из фонового потока)"""
+        pending, failed = get_work_outbox().counts()
+        icon = "✅" if success else "❌"
+        self.signals.message.emit(f"{icon} {order_number}: {message} (в очереди: {pending}, с ошибкой: {failed})")
+
+    def dispose(self):
+        """Освобождает ресурсы виджета, когда станция закрывается или заменяется другой"""
+        get_task_executor().cancel(self)
+        get_work_outbox().remove_listener(self.on_work_process_result)
+        self.scan_pipeline.stop()
+        self.refresh_timer.stop()
+        # документы и индексы этикеток — самое тяжёлое в виджете
+        for labels in (self.labels, self.single_labels):
+            if labels is not None:
+                labels.release()
+        self.labels = self.single_labels = None
+        self.results.flush()
+
+    def closeEvent(self, event):
+        """Закрытие виджета: фоновые задачи отменяются, ресурсы освобождаются"""
+        self.dispose()
+        super().closeEvent(event)
 
     def clear_search_input(self):
         """Очищает строку поиска и сбрасывает чекбокс 'Брак' (GUI-поток)"""
@@ -184,40 +215,94 @@ class UpakovkaMebelWidget(QWidget):
 
     # === Логика ===
     def fetch_labels_from_server(self):
-        """Загружает PDF с сервера"""
+        """Загрузка актуальных этикеток по кнопке"""
+        self.refresh_labels(scheduled=False)
+
+    def scheduled_refresh(self):
+        """Плановое обновление — только если этикетки уже загружены"""
+        if self.labels is not None:
+            self.refresh_labels(scheduled=True)
+
+    def refresh_labels(self, scheduled):
+        """
+        Загружает PDF и строит новое поколение этикеток в фоне. Пока оно строится,
+        поиск работает по предыдущему поколению; готовое поколение подменяется целиком.
+        Только самая первая загрузка показывается сразу — поиск идёт по мере индексации.
+        """
         if not USER_CONTEXT:
-            # Сигнал вызовет QMessageBox.warning в GUI-потоке
-            self.signals.show_warning.emit("Ошибка", "Нет авторизованных пользователей!")
+            if not scheduled:
+                # Сигнал вызовет QMessageBox.warning в GUI-потоке
+                self.signals.show_warning.emit("Ошибка", "Нет авторизованных пользователей!")
             return
 
-        username = USER_CONTEXT[0]["username"]
-        self.signals.message.emit("📦 Получение актуальных этикеток...")
+        username = USER_CONTEXT.first_username()
+        self.signals.message.emit("🔄 Плановое обновление этикеток..." if scheduled else "📦 Получение актуальных этикеток...")
 
         def worker():
-            success, msg, pdf_bytes = download_packages(username, True)
-            self.signals.message.emit(msg)
-            if not success or not pdf_bytes:
+            if not self.refresh_lock.acquire(blocking=False):
+                if not scheduled:
+                    self.signals.message.emit("⏳ Этикетки уже обновляются.")
                 return
             try:
-                temp_pdf_path = os.path.join(tempfile.gettempdir(), "packages_mebel.pdf")
-                with open(temp_pdf_path, "wb") as f:
-                    f.write(pdf_bytes)
-
-                doc = fitz.open(temp_pdf_path)
-                pages_text = [
-                    doc[page].get_text("text").splitlines()
-                    for page in range(len(doc))
-                ]
-
-                self.doc = doc
-                self.pages_text = pages_text
-                # Установка пути и сообщение — через сигналы в GUI-поток
-                self.signals.set_path.emit(temp_pdf_path)
-                self.signals.message.emit(f"✅ PDF загружен ({len(doc)} страниц).")
+                success, msg, pdf_path = download_packages_to_file(
+                    username, True,
+                    progress=lambda received, total, speed: self.signals.message.emit(
+                        format_download_progress(received, total, speed))
+                )
+                self.signals.message.emit(msg)
+                if not success or not pdf_path:
+                    return
+                # имя файла в кэше — SHA-256 содержимого
+                digest = os.path.splitext(os.path.basename(pdf_path))[0]
+                current = self.labels
+                # прерванную индексацию того же PDF повторяем, а не считаем готовой
+                if current is not None and digest == current.digest and current.fully_indexed():
+                    self.signals.message.emit(f"♻️ Этикетки не изменились, индекс готов ({current.page_count()} страниц).")
+                    return
+
+                def publish_first(generation):
+                    if self.labels is None:
+                        self.labels = generation
+                        self.signals.set_path.emit(f"packages_mebel.pdf ({generation.size // 1024} КБ)")
+
+                generation, from_cache = build_label_generation(
+                    pdf_path, digest, PACKAGES_CACHE_DIR, self.signals.message.emit,
+                    on_indexing=publish_first if current is None else None, previous=current,
+                )
+                # атомарная замена: поиск видит либо старое поколение целиком, либо новое
+                previous, self.labels = self.labels, generation
+                if previous is not None and previous is not generation:
+                    self.signals.message.emit(
+                        f"🗂️ Кэш этикеток прежнего PDF: {format_cache_stats(previous.page_cache.stats())}")
+                    previous.release()
+                self.signals.set_path.emit(f"packages_mebel.pdf ({generation.size // 1024} КБ)")
+                if from_cache:
+                    self.signals.message.emit(f"✅ PDF загружен ({generation.page_count()} страниц), индекс взят из кэша.")
+                else:
+                    self.signals.message.emit(f"✅ PDF загружен ({generation.page_count()} страниц).")
+                if current is not None:
+                    self.signals.message.emit(format_order_changes(*order_changes(current.label_index, generation.label_index)))
+                self.prefill_labels(generation)
             except Exception as e:
                 self.signals.message.emit(f"❌ Ошибка обработки PDF: {e}")
+            finally:
+                self.refresh_lock.release()
+
+        get_task_executor().submit("network", worker, owner=self)
+
+    def prefill_labels(self, generation):
+        """Фоном заранее готовит к печати страницы с заказами из нового PDF"""
+        def worker():
+            try:
+                prepared = generation.prefill()
+                if not generation.prefill_stop.is_set():
+                    self.signals.message.emit(
+                        f"🗂️ Этикеток подготовлено к печати: {prepared} "
+                        f"(кэш: {format_cache_stats(generation.page_cache.stats())})")
+            except Exception as e:
+                self.signals.message.emit(f"⚠️ Ошибка подготовки этикеток к печати: {e}")
 
-        threading.Thread(target=worker, daemon=True).start()
+        get_task_executor().submit("pdf", worker, priority=PRIORITY_LOW, owner=self)
 
     def send_to_server(self, query, operation_type):
         """Асинхронная отправка данных на сервер"""
@@ -231,47 +316,33 @@ class UpakovkaMebelWidget(QWidget):
             except Exception as e:
                 self.signals.message.emit(f"❌ Ошибка при обработке: {e}")
 
-        threading.Thread(target=sender, daemon=True).start()
+        get_task_executor().submit("network", sender, owner=self)
 
-    def print_page(self, page_num, query, operation_type):
-        """Печатает страницу и по завершении запускает отправку данных"""
-        def worker():
-            try:
-                temp_pdf = tempfile.mktemp(".pdf")
-                writer = fitz.open()
-                writer.insert_pdf(self.doc, from_page=page_num, to_page=page_num)
-                writer.save(temp_pdf)
-                writer.close()
-
-                success = False
-                if platform.system() == "Windows":
-                    result = win32api.ShellExecute(0, "print", temp_pdf, None, ".", 0)
-                    if result > 32:
-                        success = True
-                else:
-                    ret = os.system(f"lp '{temp_pdf}'")
-                    if ret == 0:
-                        success = True
+    def print_page(self, labels, page_num, query, operation_type):
+        """Ставит страницу поколения labels в общую очередь печати; operation_type=None — без отправки данных"""
+        try:
+            pdf_bytes = labels.page_pdf(page_num)
+        except Exception as e:
+            self.signals.message.emit(f"❌ Ошибка при печати: {e}")
+            return
 
-                if success:
-                    self.signals.message.emit("✅ Печать выполнена успешно!")
-                    # После успешной печати — отправляем данные
+        def on_status(job):
+            if job.status == JOB_DONE:
+                self.signals.message.emit("✅ Печать выполнена успешно!")
+                if operation_type:
                     self.send_to_server(query, operation_type)
-                    # Очистка полей — через сигнал
-                    self.signals.clear.emit()
+            elif job.status == JOB_FAILED:
+                if job.error:
+                    self.signals.message.emit(f"❌ Ошибка при печати: {job.error}")
                 else:
-                    self.signals.clear.emit()
                     self.signals.message.emit("⚠️ Принтер не найден или недоступен.")
-            except Exception as e:
-                self.signals.clear.emit()
-                self.signals.message.emit(f"❌ Ошибка при печати: {e}")
 
-        threading.Thread(target=worker, daemon=True).start()
+        get_print_spooler().submit(pdf_bytes, f"{query}.pdf", on_status)
 
     def search_text(self):
         """Поиск заказа и выполнение нужного действия"""
         if not self.download_and_print_checkbox.isChecked():
-            if not self.doc:
+            if self.labels is None:
                 self.signals.show_warning.emit("Ошибка", "Сначала получите PDF с сервера!")
                 return
 
@@ -280,26 +351,31 @@ class UpakovkaMebelWidget(QWidget):
             self.signals.show_warning.emit("Ошибка", "Введите строку для поиска!")
             return
 
-        success, message = validate_order(order_number=query, is_employee_prepared_facade=True)
-        if not success:
-            # Валидация не пройдена → выводим сообщение в консоль и прекращаем выполнение
-            self.signals.clear.emit()
-            self.append_console(f"❌ Валидация заказа не пройдена: {message}")
-            return
-        if not self.download_and_print_checkbox.isChecked():
+        download_single = self.download_and_print_checkbox.isChecked()
+        operation_type = None
+        if not download_single:
             operation_type = "PENALTY" if self.penalty_checkbox.isChecked() else "EARNING"
+        # поле очищается сразу — следующий заказ можно сканировать, не дожидаясь сервера
+        self.clear_search_input()
+        pending = self.scan_pipeline.submit(query, True, operation_type, download_single)
+        self.append_console(f"📥 Заказ {query} принят (в обработке: {pending})")
+
+    def on_order_rejected(self, order_number, message):
+        """Заказ не прошёл проверку (вызывается из потока конвейера)"""
+        self.signals.message.emit(f"❌ Валидация заказа {order_number} не пройдена: {message}")
+
+    def process_scan(self, query, operation_type, download_single):
+        """Поиск (или загрузка) и печать проверенного заказа (вызывается из потока конвейера)"""
+        if not download_single:
             self.signals.message.emit(f"🔍 Поиск {query} ... (тип операции: {operation_type})")
 
         def worker():
-            found_lines = []
-
+            # поколение фиксируется на всё время поиска и печати — обновление его не заменит на полпути
+            labels = self.labels
             # === Полный поиск ===
-            for page_num, text in enumerate(self.pages_text):
-                filtered_text = [line.strip() for line in text if re.fullmatch(r"[0-9\- ]+", line.strip())]
-                for line in filtered_text:
-                    clean_line = line.split(" ", 1)[0]
-                    if clean_line.lower() == query.lower():
-                        found_lines.append((page_num, clean_line))
+            if not labels.label_index.complete and not labels.label_index.find_exact(query):
+                self.signals.message.emit("⏳ Этикетки ещё индексируются, ожидание страницы заказа...")
+            found_lines = labels.label_index.wait_exact(query)
 
             if found_lines:
                 first_page, first_line = found_lines[0]
@@ -308,163 +384,66 @@ class UpakovkaMebelWidget(QWidget):
                 if operation_type == "PENALTY":
                     self.signals.message.emit("⚠️ Брак — печать пропущена.")
                     self.send_to_server(query, operation_type)
-                    self.signals.clear.emit()
                 else:
                     self.signals.message.emit("🖨️ Отправка на печать...")
-                    self.print_page(first_page, query, operation_type)
+                    self.print_page(labels, first_page, query, operation_type)
                 return
 
             # === Частичный поиск ===
-            if len(query) > 4:
-                saved_suffix = query[-4:]
-                short_query = query[:-4]
-                potential_labels = []
-                for page_num, text in enumerate(self.pages_text):
-                    for line in text:
-                        if short_query.lower() in line.lower():
-                            potential_labels.append((page_num, line.strip()))
-
-                if potential_labels:
-                    pages_with_short_query = set(page_num for page_num, _ in potential_labels)
-                    for page_num in pages_with_short_query:
-                        for fragment in " ".join(self.pages_text[page_num]).split():
-                            frag_clean = fragment.strip()
-                            if len(frag_clean) == 4 and frag_clean.lower() == saved_suffix.lower():
-                                self.signals.message.emit(
-                                    f"✅ Найдено (частичный поиск): {query} на стр. {page_num + 1}"
-                                )
-                                if operation_type == "PENALTY":
-                                    self.signals.message.emit("⚠️ Брак — печать пропущена.")
-                                    self.send_to_server(query, operation_type)
-                                    self.signals.clear.emit()
-                                else:
-                                    self.signals.message.emit("🖨️ Отправка на печать...")
-                                    self.print_page(page_num, query, operation_type)
-                                return
+            page_num = labels.label_index.find_partial(query)
+            if page_num is not None:
+                self.signals.message.emit(f"✅ Найдено (частичный поиск): {query} на стр. {page_num + 1}")
+                if operation_type == "PENALTY":
+                    self.signals.message.emit("⚠️ Брак — печать пропущена.")
+                    self.send_to_server(query, operation_type)
+                else:
+                    self.signals.message.emit("🖨️ Отправка на печать...")
+                    self.print_page(labels, page_num, query, operation_type)
+                return
 
             self.signals.message.emit(f"⚠️ Строка {query} не найдена.")
-            self.signals.clear.emit()
 
         def worker_single_package():
             if not USER_CONTEXT:
                 self.signals.show_warning.emit("Ошибка", "Нет авторизованных пользователей!")
                 return
 
-            username = USER_CONTEXT[0]["username"]
+            username = USER_CONTEXT.first_username()
             self.signals.message.emit(f"📦 Получение этикетки по номеру заказа {query} ...")
 
             success_download, msg, pdf_bytes = download_package_by_order(username, query)
             self.signals.message.emit(msg)
             if not success_download or not pdf_bytes:
-                self.signals.clear.emit()
                 return
             try:
-                temp_pdf_path = os.path.join(tempfile.gettempdir(), "single_package.pdf")
-                with open(temp_pdf_path, "wb") as f:
-                    f.write(pdf_bytes)
-
-                self.single_doc = fitz.open(temp_pdf_path)
-                self.single_pages_text = [
-                    self.single_doc[page].get_text("text").splitlines()
-                    for page in range(len(self.single_doc))
-                ]
+                single = LabelGeneration.from_pdf(pdf_bytes)
+                previous, self.single_labels = self.single_labels, single
+                if previous is not None:
+                    previous.release()
                 self.signals.message.emit(f"✅ PDF для заказа {query} загружен.")
             except Exception as e:
                 self.signals.message.emit(f"❌ Ошибка обработки PDF для заказа {query}: {e}")
                 return
 
-            found_lines = []
-
-            for page_num, text in enumerate(self.single_pages_text):
-                filtered_text = [line.strip() for line in text if re.fullmatch(r"[0-9\- ]+", line.strip())]
-                for line in filtered_text:
-                    clean_line = line.split(" ", 1)[0]
-                    if clean_line.lower() == query.lower():
-                        found_lines.append((page_num, clean_line))
+            found_lines = single.label_index.find_exact(query)
 
             if found_lines:
                 first_page, first_line = found_lines[0]
                 self.signals.message.emit(f"✅ Найдено: {first_line} на стр. {first_page + 1}")
                 self.signals.message.emit("🖨️ Отправка на печать...")
-                try:
-                    temp_pdf = tempfile.mktemp("single_package.pdf")
-                    writer = fitz.open()
-                    writer.insert_pdf(self.single_doc, from_page=first_page, to_page=first_page)
-                    writer.save(temp_pdf)
-                    writer.close()
-
-                    success = False
-                    if platform.system() == "Windows":
-                        result = win32api.ShellExecute(0, "print", temp_pdf, None, ".", 0)
-                        if result > 32:
-                            success = True
-                    else:
-                        ret = os.system(f"lp '{temp_pdf}'")
-                        if ret == 0:
-                            success = True
-
-                    if success:
-                        self.signals.message.emit("✅ Печать выполнена успешно!")
-                        self.signals.clear.emit()
-                    else:
-                        self.signals.message.emit("⚠️ Принтер не найден или недоступен.")
-                        self.signals.clear.emit()
-                except Exception as e:
-                    self.signals.message.emit(f"❌ Ошибка при печати: {e}")
-                    self.signals.clear.emit()
+                self.print_page(single, first_page, query, None)
                 return
 
-            if len(query) > 4:
-                saved_suffix = query[-4:]
-                short_query = query[:-4]
-                potential_labels = []
-                for page_num, text in enumerate(self.single_pages_text):
-                    for line in text:
-                        if short_query.lower() in line.lower():
-                            potential_labels.append((page_num, line.strip()))
-
-                if potential_labels:
-                    pages_with_short_query = set(page_num for page_num, _ in potential_labels)
-                    for page_num in pages_with_short_query:
-                        for fragment in " ".join(self.single_pages_text[page_num]).split():
-                            frag_clean = fragment.strip()
-                            if len(frag_clean) == 4 and frag_clean.lower() == saved_suffix.lower():
-                                self.signals.message.emit(
-                                    f"✅ Найдено (частичный поиск): {query} на стр. {page_num + 1}"
-                                )
-                                self.signals.message.emit("🖨️ Отправка на печать...")
-                                try:
-                                    temp_pdf = tempfile.mktemp("single_package.pdf")
-                                    writer = fitz.open()
-                                    writer.insert_pdf(self.single_doc, from_page=page_num, to_page=page_num)
-                                    writer.save(temp_pdf)
-                                    writer.close()
-
-                                    success = False
-                                    if platform.system() == "Windows":
-                                        result = win32api.ShellExecute(0, "print", temp_pdf, None, ".", 0)
-                                        if result > 32:
-                                            success = True
-                                    else:
-                                        ret = os.system(f"lp '{temp_pdf}'")
-                                        if ret == 0:
-                                            success = True
-
-                                    if success:
-                                        self.signals.message.emit("✅ Печать выполнена успешно!")
-                                        self.signals.clear.emit()
-                                    else:
-                                        self.signals.message.emit("⚠️ Принтер не найден или недоступен.")
-                                        self.signals.clear.emit()
-                                except Exception as e:
-                                    self.signals.message.emit(f"❌ Ошибка при печати: {e}")
-                                    self.signals.clear.emit()
-                                return
+            page_num = single.label_index.find_partial(query)
+            if page_num is not None:
+                self.signals.message.emit(f"✅ Найдено (частичный поиск): {query} на стр. {page_num + 1}")
+                self.signals.message.emit("🖨️ Отправка на печать...")
+                self.print_page(single, page_num, query, None)
+                return
 
             self.signals.message.emit(f"⚠️ Строка {query} не найдена.")
-            self.signals.clear.emit()
 
-        if not self.download_and_print_checkbox.isChecked():
-            threading.Thread(target=worker, daemon=True).start()
+        if not download_single:
+            worker()
         else:
-            threading.Thread(target=worker_single_package, daemon=True).start()
+            worker_single_package()
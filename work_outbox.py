@@ -0,0 +1,218 @@
+import json
+import sqlite3
+import threading
+import time
+
+STATUS_PENDING = "pending"
+STATUS_FAILED = "failed"
+
+# Сколько хранить события с ошибкой (для разбора), затем они удаляются
+FAILED_KEEP_SECONDS = 7 * 24 * 60 * 60
+
+
+class SendDeferred(Exception):
+    """Отправить сейчас нельзя (например, нет авторизованных пользователей) — попытка не засчитывается"""
+
+
+class WorkOutbox:
+    """
+    Локальная очередь событий work/process (SQLite в режиме WAL).
+    Событие сначала записывается на диск, затем фоновый поток отправляет
+    накопившиеся события пачками с повторами. Очередь переживает перезапуск программы.
+
+    sender(event) -> (delivered: bool, message: str, retry: bool)
+      delivered=True        — событие принято сервером, удаляется из очереди
+      delivered=False, retry=True  — временная ошибка (сеть/5xx), повтор позже
+      delivered=False, retry=False — сервер отклонил событие, помечается как failed
+    Исключение SendDeferred — отправка откладывается до следующего цикла без учёта попытки.
+    События, для которых исчерпаны попытки, возвращаются в очередь при запуске и по retry_failed();
+    события с ошибкой старше FAILED_KEEP_SECONDS удаляются при запуске.
+    """
+
+    def __init__(self, db_path, sender, batch_size=20, flush_interval=2.0,
+                 max_attempts=20, max_backoff=60.0):
+        self.db_path = db_path
+        self.sender = sender
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._listeners = []
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS work_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                order_number TEXT NOT NULL,
+                operation_type TEXT NOT NULL,
+                employees TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                last_error TEXT
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_work_events_status ON work_events (status, next_attempt_at)"
+        )
+
+    # === Подписчики ===
+    def add_listener(self, callback):
+        """callback(order_number, success, message) вызывается из фонового потока"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _notify(self, order_number, success, message):
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(order_number, success, message)
+            except Exception as e:
+                print(f"Ошибка обработчика очереди отправки: {e}")
+
+    # === Очередь ===
+    def append(self, order_number, operation_type, employees):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO work_events (order_number, operation_type, employees, created_at) VALUES (?, ?, ?, ?)",
+                (order_number, operation_type, json.dumps(employees, ensure_ascii=False), time.time())
+            )
+        self._wakeup.set()
+
+    def counts(self):
+        """Возвращает (pending, failed)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM work_events GROUP BY status"
+            ).fetchall()
+        stats = dict(rows)
+        return stats.get(STATUS_PENDING, 0), stats.get(STATUS_FAILED, 0)
+
+    def _next_batch(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, order_number, operation_type, employees, attempts FROM work_events "
+                "WHERE status = ? AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (STATUS_PENDING, time.time(), self.batch_size)
+            ).fetchall()
+        return [
+            {
+                "id": row[0],
+                "order_number": row[1],
+                "operation_type": row[2],
+                "employees": json.loads(row[3]),
+                "attempts": row[4],
+            }
+            for row in rows
+        ]
+
+    def _mark_delivered(self, event_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM work_events WHERE id = ?", (event_id,))
+
+    def _mark_failed(self, event_id, message, attempts=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE work_events SET status = ?, last_error = ?, attempts = COALESCE(?, attempts) WHERE id = ?",
+                (STATUS_FAILED, message, attempts, event_id)
+            )
+
+    def _mark_retry(self, event, message):
+        attempts = event["attempts"] + 1
+        if attempts >= self.max_attempts:
+            self._mark_failed(event["id"], message, attempts)
+            return False
+        delay = min(self.max_backoff, 2 ** attempts)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE work_events SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time() + delay, message, event["id"])
+            )
+        return True
+
+    def retry_failed(self):
+        """
+        Возвращает в очередь события, для которых исчерпаны попытки (отклонённые сервером
+        остаются с ошибкой). Возвращает их количество
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE work_events SET status = ?, attempts = 0, next_attempt_at = 0 "
+                "WHERE status = ? AND attempts >= ?",
+                (STATUS_PENDING, STATUS_FAILED, self.max_attempts)
+            )
+        self._wakeup.set()
+        return cursor.rowcount
+
+    def purge_failed(self, max_age=FAILED_KEEP_SECONDS):
+        """Удаляет события с ошибкой старше max_age секунд. Возвращает их количество"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM work_events WHERE status = ? AND created_at < ?",
+                (STATUS_FAILED, time.time() - max_age)
+            )
+        return cursor.rowcount
+
+    # === Фоновая отправка ===
+    def start(self):
+        self.purge_failed()
+        self.retry_failed()
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="work-outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def flush(self):
+        """Отправляет одну пачку событий. Возвращает размер пачки (0 — если отправка прервана)"""
+        batch = self._next_batch()
+        for event in batch:
+            try:
+                delivered, message, retry = self.sender(event)
+            except SendDeferred:
+                return 0
+            except Exception as e:
+                delivered, message, retry = False, f"Ошибка отправки: {e}", True
+
+            if delivered:
+                self._mark_delivered(event["id"])
+                self._notify(event["order_number"], True, message)
+            elif retry:
+                if self._mark_retry(event, message):
+                    # Сервер недоступен — остальную пачку не отправляем до следующего цикла
+                    return 0
+                self._notify(event["order_number"], False, message)
+            else:
+                self._mark_failed(event["id"], message)
+                self._notify(event["order_number"], False, message)
+        return len(batch)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                processed = self.flush()
+            except Exception as e:
+                print(f"Ошибка очереди отправки: {e}")
+                processed = 0
+            if processed < self.batch_size:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
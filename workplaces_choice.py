@@ -2,13 +2,9 @@ from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QComboBox, QPushButton
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import QTimer
 
-from chpu_widget import ChpuWidget
-from kromka_widget import KromkaWidget
 from seller_supp_api import get_workplaces, save_workplace, validate_secondary_auth
 import secondary_auth_gui
-from pila_widget import PilaWidget
-from upakovka_mebel_widget import UpakovkaMebelWidget
-from upakovka_widget import UpakovkaWidget
+from station_registry import has_station, open_station, prewarm_stations, show_page
 
 
 class WorkplacesChoiceWidget(QWidget):
@@ -63,6 +59,8 @@ class WorkplacesChoiceWidget(QWidget):
             self.combo.clear()
             self.combo.addItems(result)
             self.append_console(f"✅ Рабочие места: {', '.join(result)}")
+            # модули доступных станций подгружаются заранее, пока выбирается рабочее место
+            prewarm_stations(result)
         else:
             self.append_console(result)
 
@@ -79,25 +77,6 @@ class WorkplacesChoiceWidget(QWidget):
             sec_auth_widget = secondary_auth_gui.SecondaryAuthWidget(
                 self.stacked_widget, self.username, required_wp, back_widget=self
             )
-            self.stacked_widget.addWidget(sec_auth_widget)
-            self.stacked_widget.setCurrentWidget(sec_auth_widget)
-        elif selected_wp == "Пила-мастер":
-            pila_widget = PilaWidget()
-            self.stacked_widget.addWidget(pila_widget)
-            self.stacked_widget.setCurrentWidget(pila_widget)
-        elif selected_wp == "Кромщик":
-            kromka_widget = KromkaWidget()
-            self.stacked_widget.addWidget(kromka_widget)
-            self.stacked_widget.setCurrentWidget(kromka_widget)
-        elif selected_wp == "ЧПУ":
-            chpu_widget = ChpuWidget()
-            self.stacked_widget.addWidget(chpu_widget)
-            self.stacked_widget.setCurrentWidget(chpu_widget)
-        elif selected_wp == "Упаковщик":
-            upakovka_widget = UpakovkaWidget()
-            self.stacked_widget.addWidget(upakovka_widget)
-            self.stacked_widget.setCurrentWidget(upakovka_widget)
-        elif selected_wp == "Упаковщик мебели":
-            upakovka_mebel_widget = UpakovkaMebelWidget()
-            self.stacked_widget.addWidget(upakovka_mebel_widget)
-            self.stacked_widget.setCurrentWidget(upakovka_mebel_widget)
\ No newline at end of file
+            show_page(self.stacked_widget, sec_auth_widget)
+        elif has_station(selected_wp):
+            open_station(self.stacked_widget, selected_wp)